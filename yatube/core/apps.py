@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .personal import mark_logged_in, mark_logged_out
+
+        connection_created.connect(configure_sqlite)
+        user_logged_in.connect(mark_logged_in)
+        user_logged_out.connect(mark_logged_out)
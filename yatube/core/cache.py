@@ -0,0 +1,280 @@
+"""Бэкенды кэша и защита от одновременного пересчёта.
+
+Кэш выбирается переменной окружения CACHE_BACKEND (см. settings):
+
+* locmem - кэш в памяти процесса, для разработки и тестов;
+* memcached - общий кэш всех процессов и серверов;
+* sqlite - файл SQLite на диске: общий для процессов одного
+  сервера, вытесняет давно не читанные ключи (LRU).
+
+Все бэкенды считают попадания и промахи для PerformanceMiddleware.
+"""
+import math
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache import cache as default_cache
+from django.core.cache.backends import memcached
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .metrics import InstrumentedCacheMixin
+
+
+class MemcachedCache(InstrumentedCacheMixin, memcached.MemcachedCache):
+    pass
+
+
+class BaseSQLiteCache(BaseCache):
+    """Кэш в файле SQLite с вытеснением давно не читанных ключей.
+
+    LOCATION - путь к файлу. Когда ключей больше MAX_ENTRIES,
+    удаляются просроченные и 1/CULL_FREQUENCY самых давно
+    прочитанных. Время чтения обновляется не чаще раза
+    в ACCESS_RESOLUTION секунд, чтобы чтения не превращались в записи.
+
+    COUNT(*) в SQLite читает всю таблицу, поэтому число ключей
+    оценивается сверху: к последнему подсчёту прибавляются записи
+    этого процесса. Таблица пересчитывается, только когда оценка
+    превысит MAX_ENTRIES.
+    """
+
+    ACCESS_RESOLUTION = 10
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._entries = None
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'expires REAL, accessed REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS cache_accessed '
+                'ON cache (accessed)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _read(self, keys):
+        now = time.time()
+        rows = self._connection.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            'WHERE key IN ({})'.format(', '.join('?' * len(keys))),
+            keys,
+        ).fetchall()
+        values, expired, touched = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            values[key] = pickle.loads(value)
+            if now - accessed > self.ACCESS_RESOLUTION:
+                touched.append(key)
+        if expired:
+            self._delete(expired)
+        if touched:
+            self._connection.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                [(now, key) for key in touched],
+            )
+        return values
+
+    def _delete(self, keys):
+        cursor = self._connection.execute(
+            'DELETE FROM cache WHERE key IN ({})'.format(
+                ', '.join('?' * len(keys))
+            ),
+            keys,
+        )
+        return cursor.rowcount
+
+    def _write(self, items, timeout, mode='REPLACE'):
+        expires = self.get_backend_timeout(timeout)
+        if expires == -1:
+            # Нулевой или отрицательный timeout: ключ сразу устарел
+            self._delete([key for key, _ in items])
+            return 0
+        now = time.time()
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if mode == 'IGNORE':
+                # add() не перетирает живой ключ, но занимает просроченный
+                connection.executemany(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    [(key, now) for key, _ in items],
+                )
+            cursor = connection.executemany(
+                f'INSERT OR {mode} INTO cache '
+                '(key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                [
+                    (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                     expires, now)
+                    for key, value in items
+                ],
+            )
+            written = cursor.rowcount
+            self._cull(now, written)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return written
+
+    def _cull(self, now, written):
+        if self._entries is not None:
+            self._entries += written
+            if self._entries <= self._max_entries:
+                return
+        count = self._entries = self._connection.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self._connection.execute('DELETE FROM cache')
+            self._entries = 0
+            return
+        count -= self._connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (now,)
+        ).rowcount
+        count -= self._connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (count // self._cull_frequency,),
+        ).rowcount
+        self._entries = count
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        if timeout <= 0:
+            return -1
+        return time.time() + timeout
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._read([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        return {
+            keys[key]: value
+            for key, value in self._read(list(keys)).items()
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write([(self._key(key, version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            [(self._key(key, version), value) for key, value in data.items()],
+            timeout,
+        )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._write(
+            [(self._key(key, version), value)], timeout, mode='IGNORE'
+        ))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        if expires == -1:
+            return bool(self._delete([key]))
+        cursor = self._connection.execute(
+            'UPDATE cache SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (expires, key, time.time()),
+        )
+        return bool(cursor.rowcount)
+
+    def delete(self, key, version=None):
+        return bool(self._delete([self._key(key, version)]))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._delete(keys)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return key in self._read([key])
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+        self._entries = 0
+
+    def close(self, **kwargs):
+        # Соединение живёт дольше запроса: у каждого потока своё
+        pass
+
+
+class SQLiteCache(InstrumentedCacheMixin, BaseSQLiteCache):
+    pass
+
+
+def get_or_compute(key, compute, timeout, cache=None, beta=1.0,
+                   lock_timeout=10, wait=0.05):
+    """cache.get_or_set с защитой от одновременного пересчёта.
+
+    Вместе со значением хранятся его срок и время вычисления.
+    Незадолго до срока значение с растущей вероятностью
+    пересчитывается заранее (probabilistic early expiration):
+    пересчитывает тот, кто первым занял блокировку, остальные
+    пока отдают старое значение. При промахе пересчитывает тоже
+    один запрос, а остальные до lock_timeout секунд ждут его
+    результата.
+    """
+    cache = cache or default_cache
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        early = delta * beta * -math.log(1 - random.random())
+        if time.time() + early < expires:
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            return value
+    elif not cache.add(lock_key, 1, lock_timeout):
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            time.sleep(wait)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # Вычислявший запрос не справился: считаем сами
+    try:
+        started = time.time()
+        value = compute()
+        now = time.time()
+        expires = math.inf if timeout is None else now + timeout
+        cache.set(key, (value, expires, now - started), timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
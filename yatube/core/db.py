@@ -0,0 +1,16 @@
+"""Настройка соединений с базой данных."""
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite.
+
+    PRAGMA действуют на соединение, а не на файл базы (кроме
+    journal_mode=WAL, который запоминается в самом файле), поэтому
+    выставляются по сигналу connection_created.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
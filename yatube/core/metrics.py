@@ -0,0 +1,119 @@
+"""Счётчики производительности текущего запроса.
+
+PerformanceMiddleware заводит RequestMetrics на время запроса,
+а обёртки ниже (шаблонный движок, кэш, SQL) добавляют в него
+свои замеры. Вне замеряемого запроса обёртки ничего не делают.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache.backends import locmem
+from django.template.backends import django as django_backend
+
+_current = ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Вложенные вызовы кэша (get_many через get) не считаются дважды
+        self.cache_depth = 0
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Собирает замеры кода внутри блока."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper: число и время запросов."""
+    metrics = current()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_count += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Движок DTL, который замеряет отрисовку шаблонов.
+
+    Время включает вложенные шаблоны и запросы к базе,
+    которые ленивые QuerySet делают во время отрисовки.
+    """
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи get и get_many."""
+
+    @contextmanager
+    def _counting(self):
+        metrics = current()
+        if metrics is None:
+            yield None
+            return
+        metrics.cache_depth += 1
+        try:
+            yield metrics if metrics.cache_depth == 1 else None
+        finally:
+            metrics.cache_depth -= 1
+
+    def get(self, key, default=None, version=None):
+        with self._counting() as metrics:
+            value = super().get(key, _MISSING, version)
+            if metrics is not None:
+                if value is _MISSING:
+                    metrics.cache_misses += 1
+                else:
+                    metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with self._counting() as metrics:
+            values = super().get_many(keys, version)
+            if metrics is not None:
+                metrics.cache_hits += len(values)
+                metrics.cache_misses += len(keys) - len(values)
+        return values
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('core.performance')
+
+
+class PerformanceMiddleware:
+    """Замеряет, на что уходит время запроса.
+
+    Для доли запросов PERFORMANCE_SAMPLE_RATE считает время и число
+    SQL-запросов, время отрисовки шаблонов, попадания и промахи кэша,
+    отдаёт их заголовком Server-Timing и пишет строкой JSON в лог.
+    Запросы дольше PERFORMANCE_SLOW_REQUEST_MS попадают в лог
+    с уровнем WARNING, даже если не попали в выборку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PERFORMANCE_SAMPLE_RATE
+        start = time.perf_counter()
+        if not sampled:
+            response = self.get_response(request)
+            total = time.perf_counter() - start
+            if total * 1000 >= settings.PERFORMANCE_SLOW_REQUEST_MS:
+                self.log(request, response, {'total_ms': ms(total)})
+            return response
+        with ExitStack() as stack:
+            request_metrics = stack.enter_context(metrics.collect())
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.sql_wrapper)
+                )
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        data = {
+            'total_ms': ms(total),
+            'sql_count': request_metrics.sql_count,
+            'sql_ms': ms(request_metrics.sql_time),
+            'template_ms': ms(request_metrics.template_time),
+            'cache_hits': request_metrics.cache_hits,
+            'cache_misses': request_metrics.cache_misses,
+        }
+        response['Server-Timing'] = server_timing(data)
+        self.log(request, response, data)
+        return response
+
+    def log(self, request, response, data):
+        data = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **data,
+        }
+        slow = data['total_ms'] >= settings.PERFORMANCE_SLOW_REQUEST_MS
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps(data, ensure_ascii=False),
+            extra={'performance': data},
+        )
+
+
+class LoginMarkerMiddleware:
+    """Ставит cookie-метку при входе и снимает при выходе.
+
+    Метку видит JavaScript общих страниц (см. core.personal):
+    cookie сессии ему недоступна.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        marker = getattr(request, 'login_marker', None)
+        if marker:
+            response.set_cookie(
+                settings.LOGIN_MARKER_COOKIE, '1',
+                max_age=settings.SESSION_COOKIE_AGE,
+                samesite='Lax',
+            )
+        elif marker is not None:
+            response.delete_cookie(settings.LOGIN_MARKER_COOKIE)
+        return response
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def server_timing(data):
+    return ', '.join((
+        f'db;dur={data["sql_ms"]};desc="{data["sql_count"]} queries"',
+        f'tpl;dur={data["template_ms"]}',
+        'cache;desc="{} hits, {} misses"'.format(
+            data['cache_hits'], data['cache_misses']
+        ),
+        f'total;dur={data["total_ms"]}',
+    ))
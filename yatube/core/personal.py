@@ -0,0 +1,99 @@
+"""Личные фрагменты общих страниц.
+
+При SHARED_PAGES=1 страницы из кэша страниц (posts.page_cache)
+собираются как для гостя и одинаковы для всех посетителей,
+поэтому их может отдавать общий кэш или CDN. Части, которые
+зависят от пользователя (меню, кнопки подписки и правки, форма
+комментария), размечены тегом {% personal %}: вошедший
+пользователь догружает их одним запросом к personal_fragments.
+
+Фрагмент - шаблон и функция, которая строит его контекст
+по запросу и объектам моделей. Объекты передаются по pk,
+поэтому фрагмент можно отрисовать и внутри страницы,
+и отдельно от неё.
+"""
+from collections import namedtuple
+
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+
+Fragment = namedtuple('Fragment', 'template get_context models')
+
+_fragments = {}
+
+
+def fragment(name, template_name, **models):
+    """Регистрирует функцию контекста фрагмента name.
+
+    models - QuerySet для каждого аргумента-объекта: по нему
+    объект ищется, когда фрагмент запрошен отдельно.
+    """
+    def decorator(get_context):
+        _fragments[name] = Fragment(template_name, get_context, models)
+        return get_context
+    return decorator
+
+
+def get(name):
+    return _fragments[name]
+
+
+def is_shared(request):
+    return getattr(request, 'shared_page', False)
+
+
+def view_name(request):
+    """Имя URL страницы, на которой стоит фрагмент.
+
+    Отдельно запрошенному фрагменту его передаёт загрузчик страницы
+    (request.page_view_name), иначе оно берётся из адреса запроса.
+    """
+    page_view_name = getattr(request, 'page_view_name', None)
+    if page_view_name is not None:
+        return page_view_name
+    match = request.resolver_match
+    return match.view_name if match else ''
+
+
+def render_fragments(request, items):
+    """HTML фрагментов [{'name': ..., 'args': {arg: pk}}] по порядку.
+
+    Неизвестный фрагмент или аргумент - KeyError, элемент или args
+    не словарь - TypeError.
+    """
+    rendered = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(
+            item.get('args', {}), dict
+        ):
+            raise TypeError('Фрагмент и его args задаются объектами')
+        fragment = _fragments[item['name']]
+        objects = {
+            arg: get_object_or_404(fragment.models[arg], pk=pk)
+            for arg, pk in item.get('args', {}).items()
+        }
+        rendered.append(render_to_string(
+            fragment.template, fragment.get_context(request, **objects),
+            request,
+        ))
+    return rendered
+
+
+def mark_logged_in(sender, request, **kwargs):
+    # По метке страница догружает личные фрагменты только вошедшим
+    # (cookie ставит core.middleware.LoginMarkerMiddleware)
+    request.login_marker = True
+
+
+def mark_logged_out(sender, request, **kwargs):
+    request.login_marker = False
+
+
+@fragment('user_menu', 'includes/user_menu.html')
+def user_menu(request):
+    return {'view_name': view_name(request)}
+
+
+@fragment('switcher', 'includes/switcher.html')
+def switcher(request):
+    return {'view_name': view_name(request)}
@@ -0,0 +1,43 @@
+import json
+
+from django import template
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
+
+from core import personal
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal_fragment(context, name, **objects):
+    """Личная часть страницы: как {% include %}, но на общей
+    странице размечена для догрузки вошедшему пользователю."""
+    fragment = personal.get(name)
+    request = context['request']
+    values = fragment.get_context(request, **objects)
+    fragment_template = context.template.engine.get_template(
+        fragment.template
+    )
+    with context.push(**values):
+        html = fragment_template.render(context)
+    if not personal.is_shared(request):
+        return html
+    args = {arg: obj.pk for arg, obj in objects.items()}
+    return format_html(
+        '<div data-personal="{}" data-args="{}">{}</div>',
+        name, json.dumps(args), html,
+    )
+
+
+@register.inclusion_tag('includes/personal_loader.html', takes_context=True)
+def personal_loader(context):
+    """Скрипт догрузки личных фрагментов для общей страницы."""
+    request = context['request']
+    return {
+        'shared': personal.is_shared(request),
+        'url': reverse('personal_fragments'),
+        'view_name': personal.view_name(request),
+        'cookie': settings.LOGIN_MARKER_COOKIE,
+    }
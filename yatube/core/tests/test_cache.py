@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache, get_or_compute
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_get_set_delete(self):
+        """Значения пишутся, читаются, удаляются и добавляются."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'other'))
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': 2}
+        )
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(['a', 'b', 'new']), {})
+
+    def test_expired_keys_are_missing(self):
+        """Просроченный ключ не читается, и add может его занять."""
+        self.cache.set('key', 'value', 1)
+        with mock.patch('core.cache.time.time', return_value=time.time() + 2):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new', 10))
+            self.assertEqual(self.cache.get('key'), 'new')
+        self.cache.set('gone', 'value', 0)
+        self.assertIsNone(self.cache.get('gone'))
+
+    def test_shared_between_instances(self):
+        """Процессы с одним файлом видят записи друг друга."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_least_recently_read_keys_evicted(self):
+        """При переполнении вытесняются давно не читанные ключи."""
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        now = time.time()
+        for i, key in enumerate(('a', 'b', 'c')):
+            with mock.patch('core.cache.time.time', return_value=now + i):
+                cache.set(key, key)
+        # Чтение освежает ключ a: теперь самый старый - b
+        with mock.patch('core.cache.time.time', return_value=now + 100):
+            cache.get('a')
+            cache.set('d', 'd')
+        self.assertEqual(
+            sorted(cache.get_many(['a', 'b', 'c', 'd'])), ['a', 'c', 'd']
+        )
+
+    def test_writes_skip_count_below_limit(self):
+        """Пока ключей заведомо меньше предела, запись не считает их."""
+        cache = self.make_cache(MAX_ENTRIES=100)
+        cache.set('a', 'a')
+        statements = []
+        # Связанный метод списка не хэшируется, а sqlite3 в Python 3.7
+        # хранит обработчики в словаре
+        cache._connection.set_trace_callback(
+            lambda sql: statements.append(sql)
+        )
+        cache.set_many({'b': 'b', 'c': 'c'})
+        cache._connection.set_trace_callback(None)
+        self.assertFalse(any('COUNT' in sql for sql in statements))
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = LocMemCache('get-or-compute', {})
+        self.cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_value_computed_once(self):
+        """Пока значение свежее, оно не пересчитывается."""
+        for _ in range(3):
+            self.assertEqual(
+                get_or_compute('key', self.compute, 60, self.cache),
+                'value 1',
+            )
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_locked(self):
+        """Пока один запрос пересчитывает, остальные берут старое."""
+        # Значение считалось секунду и истекает через секунду:
+        # пора пересчитать заранее
+        self.cache.set('key', ('value 0', time.time() + 1, 1.0))
+        self.cache.add('key:lock', 1)
+        with mock.patch('core.cache.random.random', return_value=0.9):
+            value = get_or_compute('key', self.compute, 60, self.cache)
+        self.assertEqual(value, 'value 0')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_refresh_near_expiry(self):
+        """Незадолго до срока значение пересчитывается заранее."""
+        self.cache.set('key', ('value 0', time.time() + 1, 1.0))
+        with mock.patch('core.cache.random.random', return_value=0.9):
+            value = get_or_compute('key', self.compute, 60, self.cache)
+        self.assertEqual(value, 'value 1')
+        self.assertIsNone(self.cache.get('key:lock'))
+
+    def test_missing_value_waits_for_computing_request(self):
+        """При промахе ждёт результат запроса, занявшего блокировку."""
+        self.cache.add('key:lock', 1)
+
+        def finish(seconds):
+            self.cache.set('key', ('ready', time.time() + 60, 0))
+
+        with mock.patch('core.cache.time.sleep', side_effect=finish):
+            value = get_or_compute('key', self.compute, 60, self.cache)
+        self.assertEqual(value, 'ready')
+        self.assertEqual(self.calls, 0)
+
+
+class SingleFlightCacheTagTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_cached(self):
+        """Фрагмент кэшируется, как с {% cache %}."""
+        template = Template(
+            '{% load cache_extras %}'
+            '{% single_flight_cache 20 fragment name %}{{ text }}'
+            '{% endsingle_flight_cache %}'
+        )
+        first = template.render(Context({'name': 'tag', 'text': 'первый'}))
+        second = template.render(Context({'name': 'tag', 'text': 'второй'}))
+        self.assertEqual(first, 'первый')
+        self.assertEqual(second, 'первый')
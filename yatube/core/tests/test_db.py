@@ -0,0 +1,21 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA есть только у SQLite')
+class SQLitePragmaTests(SimpleTestCase):
+    databases = {'default'}
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        """Соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        # synchronous: 1 - NORMAL, temp_store: 2 - MEMORY
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('temp_store'), 2)
@@ -0,0 +1,59 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Post, User
+
+
+@override_settings(
+    PERFORMANCE_SAMPLE_RATE=1, PERFORMANCE_SLOW_REQUEST_MS=10000
+)
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Author')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_sampled_request_has_server_timing(self):
+        """Замеренный запрос отдаёт Server-Timing и пишет замеры в лог."""
+        with self.assertLogs('core.performance', 'INFO') as logs:
+            response = self.guest_client.get('/')
+        self.assertIn('Server-Timing', response)
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, response['Server-Timing'])
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['path'], '/')
+        self.assertEqual(data['status'], 200)
+        self.assertGreater(data['sql_count'], 0)
+        self.assertGreater(data['template_ms'], 0)
+        self.assertGreater(data['cache_misses'], 0)
+
+    def test_cache_hits_are_counted(self):
+        """Повторный запрос страницы читает её из кэша."""
+        with self.assertLogs('core.performance', 'INFO') as logs:
+            self.guest_client.get('/')
+            self.guest_client.get('/')
+        data = logs.records[1].performance
+        self.assertGreater(data['cache_hits'], 0)
+        self.assertEqual(data['cache_misses'], 0)
+        self.assertEqual(data['sql_count'], 0)
+
+    @override_settings(
+        PERFORMANCE_SAMPLE_RATE=0, PERFORMANCE_SLOW_REQUEST_MS=0
+    )
+    def test_slow_request_is_logged_without_sampling(self):
+        """Медленный запрос вне выборки попадает в лог без заголовка."""
+        with self.assertLogs('core.performance', 'WARNING') as logs:
+            response = self.guest_client.get('/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(
+            set(logs.records[0].performance),
+            {'method', 'path', 'status', 'total_ms'},
+        )
@@ -1,4 +1,10 @@
+import json
+
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+from . import personal
 
 
 def page_not_found(request, exception):
@@ -16,3 +22,19 @@ def server_error(request):
 
 def permission_denied_view(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@never_cache
+def personal_fragments(request):
+    """Личные фрагменты общей страницы одним ответом JSON.
+
+    ?view= - имя URL страницы: по нему фрагменты выделяют
+    текущий пункт меню.
+    """
+    request.page_view_name = request.GET.get('view', '')
+    try:
+        items = json.loads(request.GET.get('fragments', ''))
+        fragments = personal.render_fragments(request, items)
+    except (ValueError, TypeError, KeyError):
+        return HttpResponseBadRequest()
+    return JsonResponse({'fragments': fragments})
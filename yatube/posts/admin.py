@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import groups
 from .models import Comment, Follow, Group, Post
 
 
@@ -18,6 +19,17 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_groups()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # Выпадающий список в каждой строке list_editable
+            # строится из справочника, а не запросом на строку
+            field.choices = groups.choices()
+        return field
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = (
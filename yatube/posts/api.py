@@ -0,0 +1,203 @@
+"""JSON API только для чтения: посты, группы, комментарии, подписки.
+
+Ответы собираются из проекций .values() без экземпляров моделей.
+Списки отдаются потоком (StreamingHttpResponse) и листаются
+по курсору. ETag строится из версий областей кэша страниц
+(page_cache), поэтому ответ 304 на If-None-Match обходится
+без запросов к базе.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_safe
+
+from . import page_cache
+from .models import Comment, Follow, Group, Post
+from .utils import NEXT, CursorPaginator
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'image', 'image_placeholder',
+    'author__username', 'group__slug',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+GROUP_FIELDS = ('id', 'title', 'slug', 'description')
+FOLLOW_FIELDS = ('id', 'user__username', 'author__username')
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def etag_for(get_scopes):
+    """etag_func для condition: адрес запроса и версии областей."""
+    def etag(request, *args, **kwargs):
+        versions = page_cache.get_versions(get_scopes(**kwargs))
+        raw = '|'.join([
+            request.get_full_path(),
+            *(versions[key] for key in sorted(versions)),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag
+
+
+def api_view(get_scopes):
+    """GET/HEAD с ETag по версиям областей, которые вернёт get_scopes."""
+    def decorator(view):
+        return require_safe(condition(etag_func=etag_for(get_scopes))(view))
+    return decorator
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        limit = settings.API_PAGE_SIZE
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def stream_listing(request, rows, serialize, limit, cursor_for):
+    """Отдаёт до limit строк потоком и ссылку на продолжение.
+
+    rows - итератор по limit + 1 строкам: лишняя строка
+    означает, что список продолжается после последней отданной.
+    """
+    def content():
+        yield '{"results": ['
+        count, last, more = 0, None, False
+        for row in rows:
+            if count == limit:
+                more = True
+                break
+            yield (',' if count else '') + _dumps(serialize(row))
+            count, last = count + 1, row
+        cursor = cursor_for(last) if more else None
+        next_url = None
+        if cursor is not None:
+            query = request.GET.copy()
+            query['cursor'] = cursor
+            next_url = request.build_absolute_uri('?' + query.urlencode())
+        yield '], "next_cursor": {}, "next": {}}}'.format(
+            _dumps(cursor), _dumps(next_url)
+        )
+    return StreamingHttpResponse(content(), content_type='application/json')
+
+
+def _dated_listing(request, queryset, serialize, date_field):
+    """Список, упорядоченный по (дата, id) от новых к старым."""
+    limit = _limit(request)
+    paginator = CursorPaginator(
+        queryset, limit, date_field=date_field, key_field='id'
+    )
+    rows, direction = paginator.page_queryset(request.GET.get('cursor'))
+    if direction not in (None, NEXT):
+        # API выдаёт только курсоры вперёд
+        rows, _ = paginator.page_queryset(None)
+    return stream_listing(
+        request, rows[:limit + 1].iterator(), serialize, limit,
+        lambda row: paginator.cursor_for(NEXT, row),
+    )
+
+
+def _id_listing(request, queryset, serialize):
+    """Список, упорядоченный по id; курсор - последний отданный id."""
+    limit = _limit(request)
+    cursor = request.GET.get('cursor', '')
+    if cursor.isdigit():
+        queryset = queryset.filter(id__gt=int(cursor))
+    return stream_listing(
+        request, queryset.order_by('id')[:limit + 1].iterator(),
+        serialize, limit, lambda row: str(row['id']),
+    )
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'image_placeholder': row['image_placeholder'] or None,
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def serialize_group(row):
+    return {field: row[field] for field in GROUP_FIELDS}
+
+
+def serialize_follow(row):
+    return {
+        'id': row['id'],
+        'user': row['user__username'],
+        'author': row['author__username'],
+    }
+
+
+@api_view(lambda: [page_cache.FEED])
+def post_list(request):
+    """Посты от новых к старым, с фильтрами ?group=<slug>&author=<имя>."""
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return _dated_listing(
+        request, posts.values(*POST_FIELDS), serialize_post, 'pub_date'
+    )
+
+
+# Имя автора и комментаторов меняет область поста (см. signals),
+# а slug группы - область GROUPS
+@api_view(lambda post_id: [('post', post_id), page_cache.GROUPS])
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(
+        serialize_post(row), json_dumps_params={'ensure_ascii': False}
+    )
+
+
+@api_view(lambda post_id: [('post', post_id)])
+def comment_list(request, post_id):
+    """Комментарии поста от новых к старым."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    )
+    return _dated_listing(request, comments, serialize_comment, 'created')
+
+
+@api_view(lambda: [page_cache.GROUPS])
+def group_list(request):
+    return _id_listing(
+        request, Group.objects.values(*GROUP_FIELDS), serialize_group
+    )
+
+
+@api_view(lambda: [page_cache.FOLLOWS])
+def follow_list(request):
+    """Подписки, с фильтрами ?user=<подписчик>&author=<автор>."""
+    follows = Follow.objects.all()
+    if request.GET.get('user'):
+        follows = follows.filter(user__username=request.GET['user'])
+    if request.GET.get('author'):
+        follows = follows.filter(author__username=request.GET['author'])
+    return _id_listing(
+        request, follows.values(*FOLLOW_FIELDS), serialize_follow
+    )
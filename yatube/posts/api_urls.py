@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    # Посты
+    path('posts/', api.post_list, name='post_list'),
+    path('posts/<int:post_id>/', api.post_detail, name='post_detail'),
+    # Комментарии поста
+    path(
+        'posts/<int:post_id>/comments/',
+        api.comment_list,
+        name='comment_list'
+    ),
+    # Группы
+    path('groups/', api.group_list, name='group_list'),
+    # Подписки
+    path('follows/', api.follow_list, name='follow_list'),
+]
@@ -6,3 +6,6 @@ class PostsConfig(AppConfig):
 
     name = 'posts'
     verbose_name = 'Блог - управление записями'
+
+    def ready(self):
+        from . import fragments, signals  # noqa: F401
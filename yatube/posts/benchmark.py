@@ -0,0 +1,429 @@
+"""Нагрузочный стенд для страниц приложения posts.
+
+seed() наполняет базу правдоподобными данными: у авторов
+и постов степенное распределение популярности, поэтому есть
+и знаменитости с тысячами подписчиков, и посты без комментариев.
+measure() прогоняет через Django Client каждый URL из posts.urls
+и считает перцентили времени ответа и число запросов к базе.
+measure_templates() сравнивает отрисовку страницы ленты без кэшей
+шаблонов и карточек и с ними. measure_concurrency() нагружает
+страницы чтения параллельными клиентами и показывает, сколько
+запросов в секунду выдерживает путь WSGI с параллельным чтением
+запросов страницы и без него.
+"""
+import random
+import threading
+import time
+from collections import namedtuple
+from copy import copy
+from datetime import timedelta
+from itertools import accumulate, product
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Count
+from django.template.backends.django import DjangoTemplates
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import (
+    counters, page_cache, parallel, search, timeline, trending, urls,
+)
+from .models import Comment, Follow, Group, Post, PostStats, UserStats
+from .utils import explicit_dates
+
+User = get_user_model()
+
+# Показатель степенного закона: вес объекта с рангом r равен 1 / r ** s
+ZIPF_EXPONENT = 1.1
+DATE_RANGE = timedelta(days=365)
+# Тексты берутся из заранее сгенерированного набора:
+# вызов Faker на каждый из миллиона комментариев слишком дорог
+TEXT_POOL_SIZE = 2000
+TRANSACTION_SQL = ('SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+Case = namedtuple('Case', 'name method path client data')
+
+# Страницы только для чтения, которые нагружает measure_concurrency
+READ_ONLY_CASES = (
+    'index/user', 'group_list/user', 'profile/user', 'post_detail/user',
+    'follow_index/user',
+)
+# Режимы чтения запросов страницы, которые сравнивает measure_concurrency
+CONCURRENCY_MODES = ('sequential', 'parallel')
+
+
+def zipf_weights(count):
+    """Накопленные веса для random.choices со степенным законом."""
+    return list(accumulate(
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1)
+    ))
+
+
+def _in_batches(objects, model, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def seed(users=10000, posts=100000, comments=1000000, groups=50,
+         follows=20, batch_size=5000, seed=0):
+    """Наполняет базу данными для замеров.
+
+    follows - среднее число подписок пользователя. Данные пишутся
+    через bulk_create в обход сигналов, поэтому в конце пересобираются
+    ленты подписок, счётчики и поисковый индекс.
+    """
+    rnd = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    now = timezone.now()
+    texts = [fake.paragraph(nb_sentences=3) for _ in range(TEXT_POOL_SIZE)]
+
+    password = make_password(None)
+    _in_batches((
+        User(
+            username=f'{fake.user_name()}{number}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password=password,
+        ) for number in range(users)
+    ), User, batch_size)
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    user_weights = zipf_weights(len(user_ids))
+
+    _in_batches((
+        Group(
+            title=fake.catch_phrase()[:200],
+            slug=f'group-{number}',
+            description=fake.paragraph(),
+        ) for number in range(groups)
+    ), Group, batch_size)
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+
+    def follow_pairs():
+        for user_id in user_ids:
+            count = min(
+                int(rnd.paretovariate(2) * follows / 2), len(user_ids) - 1
+            )
+            authors = set(rnd.choices(
+                user_ids, cum_weights=user_weights, k=count
+            ))
+            authors.discard(user_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    _in_batches(follow_pairs(), Follow, batch_size)
+
+    post_date = Post._meta.get_field('pub_date')
+    comment_date = Comment._meta.get_field('created')
+    with explicit_dates(post_date, comment_date):
+        _in_batches((
+            Post(
+                text=rnd.choice(texts),
+                author_id=rnd.choices(user_ids, cum_weights=user_weights)[0],
+                group_id=(
+                    rnd.choice(group_ids)
+                    if group_ids and rnd.random() < 0.7 else None
+                ),
+                pub_date=now - rnd.random() * DATE_RANGE,
+            ) for _ in range(posts)
+        ), Post, batch_size)
+        post_rows = list(Post.objects.values_list('pk', 'pub_date'))
+        rnd.shuffle(post_rows)
+        post_weights = zipf_weights(len(post_rows))
+
+        def post_comments():
+            for _ in range(comments):
+                pk, pub_date = rnd.choices(
+                    post_rows, cum_weights=post_weights
+                )[0]
+                yield Comment(
+                    post_id=pk,
+                    author_id=rnd.choice(user_ids),
+                    text=rnd.choice(texts),
+                    created=pub_date + rnd.random() * (now - pub_date),
+                )
+
+        if post_rows:
+            _in_batches(post_comments(), Comment, batch_size)
+
+    for user_id in Follow.objects.values_list(
+        'user_id', flat=True
+    ).distinct().iterator():
+        timeline.rebuild(user_id)
+    counters.recount_all(batch_size)
+    search.rebuild()
+    trending.refresh(batch_size)
+    page_cache.bump(page_cache.FEED, page_cache.GROUPS)
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def build_cases():
+    """Запросы для замеров: каждый URL из posts.urls.
+
+    Страницы берутся на самых тяжёлых объектах: крупнейшая группа,
+    самый популярный автор, самый обсуждаемый пост.
+    """
+    author = UserStats.objects.select_related('user').order_by(
+        '-followers_count'
+    ).first().user
+    reader = UserStats.objects.select_related('user').order_by(
+        '-following_count'
+    ).first().user
+    post = PostStats.objects.select_related('post__author').order_by(
+        '-comments_count'
+    ).first().post
+    group = Group.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').first()
+    guest = Client()
+    reader_client = Client()
+    reader_client.force_login(reader)
+    author_client = Client()
+    author_client.force_login(post.author)
+    cases = []
+    for name, path in (
+        ('index', reverse('posts:index')),
+        ('hot', reverse('posts:hot')),
+        ('group_list', reverse('posts:group_list', args=[group.slug])),
+        ('profile', reverse('posts:profile', args=[author.username])),
+        ('post_detail', reverse('posts:post_detail', args=[post.pk])),
+        ('post_comments', reverse('posts:post_comments', args=[post.pk])),
+        ('search', reverse('posts:search') + f'?q={post.text.split()[0]}'),
+    ):
+        cases.append(Case(f'{name}/guest', 'get', path, guest, None))
+        cases.append(Case(f'{name}/user', 'get', path, reader_client, None))
+    cases.extend((
+        Case('post_create/user', 'get', reverse('posts:post_create'),
+             reader_client, None),
+        Case('post_edit/author', 'get',
+             reverse('posts:post_edit', args=[post.pk]), author_client, None),
+        Case('add_comment/user', 'post',
+             reverse('posts:add_comment', args=[post.pk]), reader_client,
+             {'text': 'Комментарий для замеров'}),
+        Case('follow_index/user', 'get', reverse('posts:follow_index'),
+             reader_client, None),
+        Case('follow_unread/user', 'get', reverse('posts:follow_unread'),
+             reader_client, None),
+        Case('profile_follow/user', 'get',
+             reverse('posts:profile_follow', args=[post.author.username]),
+             reader_client, None),
+        Case('profile_unfollow/user', 'get',
+             reverse('posts:profile_unfollow', args=[author.username]),
+             reader_client, None),
+    ))
+    covered = {case.name.split('/')[0] for case in cases}
+    missing = {
+        pattern.name for pattern in urls.urlpatterns
+    } - covered
+    if missing:
+        raise ValueError(f'Нет замеров для URL: {", ".join(sorted(missing))}')
+    return cases
+
+
+def percentile(values, percent):
+    """Перцентиль с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def _request(case):
+    # Изменения от запросов на запись откатываются,
+    # чтобы повторные прогоны шли на тех же данных
+    with transaction.atomic():
+        response = getattr(case.client, case.method)(case.path, case.data)
+        transaction.set_rollback(True)
+    return response
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper: считает запросы страницы.
+
+    Точки сохранения для отката к странице не относятся.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_SQL):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(cases, requests=30, warmup=3):
+    """Замеряет каждый запрос requests раз после warmup прогревочных."""
+    results = {}
+    for case in cases:
+        for _ in range(warmup):
+            _request(case)
+        timings, queries = [], []
+        for _ in range(requests):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                start = time.perf_counter()
+                response = _request(case)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+        results[case.name] = {
+            'method': case.method.upper(),
+            'path': case.path,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': round(percentile(queries, 50)),
+        }
+    return results
+
+
+def compare(baseline, results):
+    """Строки сравнения двух прогонов: имя, p95 до и после, запросы."""
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = (
+            (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms']
+            * 100 if previous['p95_ms'] else 0.0
+        )
+        rows.append((
+            name, previous['p95_ms'], current['p95_ms'], round(change, 1),
+            previous['queries'], current['queries'],
+        ))
+    return rows
+
+
+def _template_engine(cached):
+    """Движок шаблонов как в settings, с cached.Loader или без него."""
+    config = settings.TEMPLATES[0]
+    loaders = settings.TEMPLATE_LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return DjangoTemplates({
+        'NAME': f'benchmark-{"cached" if cached else "uncached"}',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**config['OPTIONS'], 'loaders': loaders},
+    })
+
+
+def measure_templates(requests=100, warmup=5,
+                      template_name='posts/follow.html'):
+    """Замеряет отрисовку страницы ленты до и после ускорений.
+
+    uncached - шаблоны читаются и компилируются на каждый include,
+    карточки постов отрисовываются заново; cached - cached.Loader
+    и карточки из кэша. Посты выбираются из базы один раз,
+    поэтому замер включает только отрисовку.
+    """
+    posts = list(Post.objects.feed()[:settings.POSTS_PER_PAGE])
+    page_obj = Paginator(posts, settings.POSTS_PER_PAGE).get_page(1)
+    request = RequestFactory().get(reverse('posts:follow_index'))
+    request.user = AnonymousUser()
+    results, pages = {}, {}
+    for name, cached in (('uncached', False), ('cached', True)):
+        template = _template_engine(cached).get_template(template_name)
+        card_timeout = settings.POST_CARD_TIMEOUT if cached else 0
+        with override_settings(POST_CARD_TIMEOUT=card_timeout):
+            for _ in range(warmup):
+                template.render({'page_obj': page_obj}, request)
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                pages[name] = template.render({'page_obj': page_obj}, request)
+                timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+        }
+    results['cached']['same_html'] = pages['cached'] == pages['uncached']
+    return results
+
+
+def _load(case, requests, timings, errors):
+    # Test Client не потокобезопасен: у каждого потока свой,
+    # с теми же cookie сессии
+    client = Client()
+    client.cookies = copy(case.client.cookies)
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            if client.get(case.path).status_code != 200:
+                errors.append(case.path)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+
+
+def measure_concurrency(cases, levels=(1, 4, 16), requests=100):
+    """Пропускная способность страниц чтения при параллельных клиентах.
+
+    Для каждого уровня параллельности requests запросов делятся
+    между потоками, у каждого своё соединение с базой. Пока рост
+    числа потоков не прибавляет запросов в секунду, а p95 растёт,
+    запросы ждут друг друга: блокировку SQLite или GIL.
+
+    Каждый уровень замеряется дважды: sequential - запросы страницы
+    идут по очереди, parallel - независимые запросы читаются в пуле
+    posts.parallel (на базе SQLite в памяти пул не используется).
+    """
+    results = {}
+    for case in cases:
+        if case.name not in READ_ONLY_CASES:
+            continue
+        for level, mode in product(levels, CONCURRENCY_MODES):
+            workers = settings.PAGE_QUERY_WORKERS if mode == 'parallel' else 0
+            timings, errors = [], []
+            threads = [
+                threading.Thread(
+                    target=_load,
+                    args=(case, requests // level + (i < requests % level),
+                          timings, errors),
+                )
+                for i in range(level)
+            ]
+            with override_settings(PAGE_QUERY_WORKERS=workers):
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+            results[f'{case.name}@{level}/{mode}'] = {
+                'concurrency': level,
+                'mode': mode,
+                'requests': len(timings),
+                'errors': len(errors),
+                'rps': round(len(timings) / elapsed, 1),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+            }
+    # Потоки пула закрывают свои соединения с базой
+    parallel.shutdown()
+    return results
@@ -0,0 +1,260 @@
+"""Отложенная запись комментариев (write-behind).
+
+При COMMENT_BUFFER_SIZE > 0 проверенные комментарии не пишутся
+в базу по одному, а копятся в буфере процесса и сохраняются одним
+bulk_create, когда их набирается COMMENT_BUFFER_SIZE или проходит
+COMMENT_BUFFER_SECONDS. Под наплывом комментариев к одному посту
+запросы не выстраиваются в очередь за блокировкой записи SQLite.
+
+Автор видит свои ещё не сохранённые комментарии: они лежат в кэше
+под его id, пока не появятся в базе (read-your-writes).
+
+Долговечность задаёт COMMENT_BUFFER_JOURNAL. Без него буфер живёт
+только в памяти, и при падении процесса несохранённые комментарии
+теряются. С ним каждый комментарий до ответа дописывается в журнал
+процесса на диске (с fsync), а журналы завершившихся процессов
+подхватываются и сохраняются при запуске буфера.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import conditional, counters, page_cache
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+# Сколько автор видит свой комментарий, если тот так и не сохранился
+PENDING_TIMEOUT = 5 * 60
+
+
+def is_enabled():
+    return settings.COMMENT_BUFFER_SIZE > 0
+
+
+def _pending_key(user_id):
+    return f'comments:pending:{user_id}'
+
+
+def save_comments(rows):
+    """Сохраняет комментарии одним bulk_create.
+
+    bulk_create не шлёт сигналы, поэтому счётчики, даты изменения
+    и версии кэша постов сдвигаются здесь. Комментарии к удалённым
+    постам и от удалённых авторов отбрасываются.
+    """
+    post_ids = set(Post.objects.filter(
+        pk__in={row['post'] for row in rows}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.filter(
+        pk__in={row['author'] for row in rows}
+    ).values_list('pk', flat=True))
+    comments = [
+        Comment(post_id=row['post'], author_id=row['author'], text=row['text'])
+        for row in rows
+        if row['post'] in post_ids and row['author'] in author_ids
+    ]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        added = Counter(comment.post_id for comment in comments)
+        for post_id, count in added.items():
+            counters.change_post(post_id, 'comments_count', count)
+            conditional.touch_post(post_id)
+    page_cache.bump(*(('post', post_id) for post_id in added))
+    return len(comments)
+
+
+class CommentBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows = []
+        self._started = False
+        self._first_added = None
+        self._journal = None
+
+    def _journal_dir(self):
+        return settings.COMMENT_BUFFER_JOURNAL
+
+    def _start(self):
+        """Поднимает журнал и фоновый поток при первом комментарии."""
+        if self._started:
+            return
+        self._started = True
+        if self._journal_dir():
+            os.makedirs(self._journal_dir(), exist_ok=True)
+            self._rows.extend(self._claim_orphans())
+            self._journal = open(self._journal_path(os.getpid()), 'a')
+            self._rewrite_journal()
+        if settings.COMMENT_BUFFER_SECONDS > 0:
+            threading.Thread(
+                target=self._run, name='comment-buffer', daemon=True
+            ).start()
+        atexit.register(self.flush)
+
+    def _journal_path(self, pid):
+        return os.path.join(self._journal_dir(), f'{pid}.ndjson')
+
+    def _claim_orphans(self):
+        """Комментарии из журналов процессов, которых уже нет."""
+        rows = []
+        for name in os.listdir(self._journal_dir()):
+            pid, ext = os.path.splitext(name)
+            if ext != '.ndjson' or not pid.isdigit() or _is_alive(int(pid)):
+                continue
+            path = os.path.join(self._journal_dir(), name)
+            claimed = f'{path}.{os.getpid()}'
+            try:
+                # Переименование атомарно: журнал достанется одному
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            with open(claimed) as journal:
+                rows.extend(json.loads(line) for line in journal if line)
+            os.remove(claimed)
+        return rows
+
+    def _rewrite_journal(self):
+        self._journal.seek(0)
+        self._journal.truncate()
+        for row in self._rows:
+            self._journal.write(json.dumps(row) + '\n')
+        self._sync_journal()
+
+    def _sync_journal(self):
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def add(self, post_id, author_id, text):
+        row = {'post': post_id, 'author': author_id, 'text': text}
+        with self._lock:
+            self._start()
+            if self._journal is not None:
+                self._journal.write(json.dumps(row) + '\n')
+                self._sync_journal()
+            self._rows.append(row)
+            if self._first_added is None:
+                self._first_added = time.monotonic()
+            full = len(self._rows) >= settings.COMMENT_BUFFER_SIZE
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Сохраняет всё накопленное; возвращает число комментариев."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._first_added = None
+            if not rows:
+                return 0
+            try:
+                saved = save_comments(rows)
+            except Exception:
+                logger.exception('Не удалось сохранить комментарии')
+                with self._lock:
+                    # Вернём в буфер: сохраним со следующей порцией
+                    self._rows[:0] = rows
+                    if self._first_added is None:
+                        self._first_added = time.monotonic()
+                return 0
+            with self._lock:
+                if self._journal is not None:
+                    self._rewrite_journal()
+            return saved
+
+    def _run(self):
+        while True:
+            time.sleep(settings.COMMENT_BUFFER_SECONDS / 2)
+            with self._lock:
+                due = (
+                    self._first_added is not None
+                    and time.monotonic() - self._first_added
+                    >= settings.COMMENT_BUFFER_SECONDS
+                )
+            if due:
+                try:
+                    self.flush()
+                finally:
+                    connection.close()
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+buffer = CommentBuffer()
+
+
+def add(request, post, text):
+    """Ставит комментарий в буфер и показывает его автору до записи."""
+    buffer.add(post.pk, request.user.pk, text)
+    key = _pending_key(request.user.pk)
+    pending = cache.get(key, [])
+    pending.append({
+        'post': post.pk, 'text': text, 'created': timezone.now(),
+    })
+    cache.set(key, pending, PENDING_TIMEOUT)
+
+
+def _pending_rows(request, post_id):
+    if not request.user.is_authenticated or not is_enabled():
+        return []
+    return [
+        row for row in cache.get(_pending_key(request.user.pk), [])
+        if row['post'] == post_id
+    ]
+
+
+def pending_state(request, post_id):
+    """Часть ETag страницы поста: несохранённые комментарии автора."""
+    return str(len(_pending_rows(request, post_id)))
+
+
+def pending(request, post):
+    """Несохранённые комментарии пользователя к посту, новые сверху.
+
+    Комментарии, которые уже появились в базе, убираются из кэша.
+    """
+    rows = _pending_rows(request, post.pk)
+    if not rows:
+        return []
+    saved = Counter(Comment.objects.filter(
+        post=post,
+        author=request.user,
+        created__gte=min(row['created'] for row in rows),
+        text__in={row['text'] for row in rows},
+    ).values_list('text', flat=True))
+    left = []
+    for row in rows:
+        if saved[row['text']]:
+            saved[row['text']] -= 1
+        else:
+            left.append(row)
+    if len(left) != len(rows):
+        key = _pending_key(request.user.pk)
+        others = [
+            row for row in cache.get(key, []) if row['post'] != post.pk
+        ]
+        cache.set(key, others + left, PENDING_TIMEOUT)
+    return [
+        Comment(
+            post=post, author=request.user,
+            text=row['text'], created=row['created'],
+        )
+        for row in reversed(left)
+    ]
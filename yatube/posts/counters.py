@@ -0,0 +1,113 @@
+from django.db.models import Count, F
+
+from .models import Comment, Follow, Post, PostStats, User, UserStats
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+POST_COUNTERS = {
+    'comments_count': (Comment, 'post'),
+}
+
+
+def _totals(counters, pks=None):
+    """Считает счётчики агрегатами: по одному GROUP BY на счётчик."""
+    totals = {}
+    for field, (model, key) in counters.items():
+        rows = model.objects.all()
+        if pks is not None:
+            rows = rows.filter(**{f'{key}__in': pks})
+        totals[field] = dict(
+            rows.order_by().values_list(key).annotate(total=Count('pk'))
+        )
+    return totals
+
+
+def _recount(stats_model, counters, pks):
+    """Пересчитывает строки счётчиков для pks и создаёт недостающие."""
+    totals = _totals(counters, pks)
+    existing = stats_model.objects.in_bulk(pks)
+    changed, created = [], []
+    for pk in pks:
+        values = {
+            field: totals[field].get(pk, 0) for field in counters
+        }
+        stats = existing.get(pk)
+        if stats is None:
+            created.append(stats_model(pk=pk, **values))
+        elif any(getattr(stats, f) != v for f, v in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            changed.append(stats)
+    stats_model.objects.bulk_create(created, ignore_conflicts=True)
+    stats_model.objects.bulk_update(changed, list(counters))
+    return len(created) + len(changed)
+
+
+def recount_users(pks):
+    return _recount(UserStats, USER_COUNTERS, list(pks))
+
+
+def recount_posts(pks):
+    return _recount(PostStats, POST_COUNTERS, list(pks))
+
+
+def _change(stats_model, recount, pk, field, delta):
+    """Сдвигает счётчик одним UPDATE с F-выражением.
+
+    Недостающая строка при увеличении создаётся пересчётом.
+    Уменьшение ниже нуля пропускается: такой рассинхрон
+    исправляет команда recount. При уменьшении строку не создаём,
+    потому что оно приходит и из каскадного удаления владельца.
+    """
+    rows = stats_model.objects.filter(pk=pk)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    if not rows.update(**{field: F(field) + delta}) and delta > 0:
+        recount([pk])
+
+
+def change_user(user_id, field, delta):
+    _change(UserStats, recount_users, user_id, field, delta)
+
+
+def change_post(post_id, field, delta):
+    _change(PostStats, recount_posts, post_id, field, delta)
+
+
+def user_stats(user):
+    """Счётчики пользователя; недостающая строка создаётся пересчётом."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recount_users([user.pk])
+        user.stats = UserStats.objects.get(pk=user.pk)
+        return user.stats
+
+
+def post_stats(post):
+    """Счётчики поста; недостающая строка создаётся пересчётом."""
+    try:
+        return post.stats
+    except PostStats.DoesNotExist:
+        recount_posts([post.pk])
+        post.stats = PostStats.objects.get(pk=post.pk)
+        return post.stats
+
+
+def recount_all(batch_size=1000):
+    """Пересчитывает все счётчики пачками, возвращает число исправлений."""
+    fixed = 0
+    for model, recount in ((User, recount_users), (Post, recount_posts)):
+        pks = model.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for pk in pks.iterator():
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                fixed += recount(batch)
+                batch = []
+        if batch:
+            fixed += recount(batch)
+    return fixed
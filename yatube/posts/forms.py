@@ -1,9 +1,15 @@
 from django import forms
 
+from posts import groups
 from posts.models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Список групп из справочника, без запроса к базе
+        self.fields['group'].choices = groups.choices()
+
     class Meta:
         model = Post
         fields = (
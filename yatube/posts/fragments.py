@@ -0,0 +1,29 @@
+"""Личные фрагменты страниц постов (см. core.personal)."""
+from core.personal import fragment
+
+from . import comment_buffer, follows
+from .forms import CommentForm
+from .models import Post, User
+
+
+@fragment('follow_button', 'includes/follow_button.html',
+          author=User.objects.all())
+def follow_button(request, author):
+    return {
+        'author': author,
+        'following': follows.is_following(request, [author])[author.pk],
+    }
+
+
+@fragment('post_actions', 'includes/post_actions.html',
+          post=Post.objects.only('pk', 'author_id'))
+def post_actions(request, post):
+    """Кнопка правки, форма и ещё не записанные комментарии автора."""
+    pending_comments = []
+    if not request.GET.get('cursor'):
+        pending_comments = comment_buffer.pending(request, post)
+    return {
+        'post': post,
+        'form': CommentForm(),
+        'pending_comments': pending_comments,
+    }
@@ -0,0 +1,108 @@
+"""SQL полнотекстового индекса постов (FTS5, есть только у SQLite).
+
+Индекс posts_post_fts ведут триггеры на posts_post и posts_group,
+поэтому он верен и после bulk_create, и после правок в обход ORM.
+
+SQLite меняет схему таблицы пересозданием: создаёт новую таблицу,
+копирует строки и переименовывает её. Триггеры, которые ссылаются
+на posts_post и posts_group, мешают переименованию, поэтому каждая
+миграция, меняющая эти таблицы, оборачивает свои операции
+в without_triggers(). Миграции берут SQL отсюда, а не друг у друга;
+меняется он только вместе с новой миграцией, которая пересоздаёт
+триггеры.
+"""
+from django.db import migrations
+
+CREATE_TABLE = """
+    CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+        text, group_title, group_description, tokenize='unicode61'
+    )
+    """
+
+CREATE_TRIGGERS = [
+    """
+    CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(
+            rowid, text, group_title, group_description
+        ) VALUES (
+            new.id,
+            new.text,
+            COALESCE(
+                (SELECT title FROM posts_group WHERE id = new.group_id), ''
+            ),
+            COALESCE(
+                (SELECT description FROM posts_group
+                 WHERE id = new.group_id), ''
+            )
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        DELETE FROM posts_post_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_update
+    AFTER UPDATE OF text, group_id ON posts_post BEGIN
+        UPDATE posts_post_fts SET
+            text = new.text,
+            group_title = COALESCE(
+                (SELECT title FROM posts_group WHERE id = new.group_id), ''
+            ),
+            group_description = COALESCE(
+                (SELECT description FROM posts_group
+                 WHERE id = new.group_id), ''
+            )
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER posts_group_fts_update
+    AFTER UPDATE OF title, description ON posts_group BEGIN
+        UPDATE posts_post_fts SET
+            group_title = new.title,
+            group_description = new.description
+        WHERE rowid IN (SELECT id FROM posts_post WHERE group_id = new.id);
+    END
+    """,
+]
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS posts_group_fts_update',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+]
+
+DROP_TABLE = 'DROP TABLE IF EXISTS posts_post_fts'
+
+# Заполняет индекс текущими постами и группами
+FILL = """
+    INSERT INTO posts_post_fts(rowid, text, group_title, group_description)
+    SELECT p.id, p.text, COALESCE(g.title, ''), COALESCE(g.description, '')
+    FROM posts_post p LEFT JOIN posts_group g ON g.id = p.group_id
+    """
+
+
+def run_sqlite(statements):
+    """Функция для RunPython, выполняющая SQL только на SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+drop_triggers = run_sqlite(DROP_TRIGGERS)
+create_triggers = run_sqlite(CREATE_TRIGGERS)
+
+
+def without_triggers(*operations):
+    """Операции миграции, на время которых триггеры индекса сняты."""
+    return [
+        migrations.RunPython(drop_triggers, create_triggers),
+        *operations,
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,81 @@
+"""Справочник групп: slug -> группа и id -> группа.
+
+Групп немного, и меняются они редко, а читаются на каждой странице:
+в карточках постов, на странице группы, в списке сообществ и в
+выпадающих списках форм. Справочник целиком лежит в кэше под версией
+области page_cache.GROUPS, а в памяти процесса хранится его копия.
+Сигналы Group меняют версию области, и при следующем обращении
+справочник загружается заново; копия старой версии истекает через
+PAGE_CACHE_TIMEOUT, как и страницы.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.query import ModelIterable
+
+from . import page_cache
+from .models import Group
+
+
+class Registry:
+    def __init__(self, version, groups):
+        self.version = version
+        self.groups = groups
+        self.by_id = {group.pk: group for group in groups}
+        self.by_slug = {group.slug: group for group in groups}
+
+
+_registry = Registry(None, [])
+
+
+def _current_version():
+    return next(iter(page_cache.get_versions([page_cache.GROUPS]).values()))
+
+
+def registry():
+    """Справочник текущей версии; загружается лениво."""
+    global _registry
+    version = _current_version()
+    if _registry.version == version:
+        return _registry
+    key = f'groups:{version}'
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(Group.objects.order_by('title'))
+        cache.set(key, groups, settings.PAGE_CACHE_TIMEOUT)
+    _registry = Registry(version, groups)
+    return _registry
+
+
+def list_groups():
+    return registry().groups
+
+
+def get(pk):
+    return registry().by_id.get(pk)
+
+
+def get_by_slug(slug):
+    return registry().by_slug.get(slug)
+
+
+def choices():
+    """Варианты для выпадающего списка групп без запроса к базе."""
+    return [('', '---------')] + [
+        (group.pk, str(group)) for group in list_groups()
+    ]
+
+
+class WithGroups(ModelIterable):
+    """Подставляет постам группы из справочника вместо JOIN."""
+
+    def __iter__(self):
+        by_id = None
+        cache_group = self.queryset.model.group.field.set_cached_value
+        for post in super().__iter__():
+            if post.group_id is not None:
+                if by_id is None:
+                    by_id = registry().by_id
+                group = by_id.get(post.group_id)
+                if group is not None:
+                    cache_group(post, group)
+            yield post
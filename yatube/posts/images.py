@@ -0,0 +1,209 @@
+"""Обработка картинок постов после загрузки.
+
+Запрос только сохраняет файл, а тяжёлая работа идёт в фоновом
+пуле: картинка пересохраняется без EXIF, уменьшается
+и перекодируется, для неё строятся размытая заглушка и превью.
+"""
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageFilter, ImageOps, features
+from sorl.thumbnail import delete, get_thumbnail
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp', 'PNG': '.png'}
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POST_IMAGE_WORKERS,
+            thread_name_prefix='post-images',
+        )
+    return _executor
+
+
+def generate_renditions(name):
+    """Строит все превью картинки из POST_IMAGE_RENDITIONS.
+
+    Возвращает True, если все превью готовы.
+    """
+    try:
+        for geometry, options in settings.POST_IMAGE_RENDITIONS:
+            get_thumbnail(name, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось построить превью для %s', name)
+        return False
+    return True
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+
+
+def target_format(image):
+    """Формат, в котором хранится картинка поста."""
+    format = settings.POST_IMAGE_FORMAT
+    if format == 'WEBP' and not features.check('webp'):
+        format = 'JPEG'
+    if format == 'JPEG' and _has_alpha(image):
+        # JPEG не хранит прозрачность
+        format = 'PNG'
+    return format
+
+
+def normalize(image):
+    """Картинка без EXIF, повёрнутая по ориентации из EXIF
+    и уменьшенная до POST_IMAGE_MAX_SIZE.
+
+    Возвращает (картинка, формат) или None, если исходник
+    уже в нужном формате и размере.
+    """
+    if getattr(image, 'is_animated', False):
+        # Анимацию не трогаем: перекодирование оставит один кадр
+        return None
+    format = target_format(image)
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    if (
+        image.format == format
+        and max(image.size) <= max_size
+        and 'exif' not in image.info
+    ):
+        return None
+    mode = 'RGBA' if _has_alpha(image) else 'RGB'
+    image = ImageOps.exif_transpose(image).convert(mode)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return image, format
+
+
+def encode(image, format):
+    options = {'optimize': True}
+    if format in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if format == 'JPEG':
+        options['progressive'] = True
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    buffer = BytesIO()
+    image.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def placeholder(image):
+    """Размытая копия картинки в несколько сотен байт (data: URI)."""
+    size = settings.POST_IMAGE_PLACEHOLDER_SIZE
+    preview = ImageOps.exif_transpose(image).convert('RGB')
+    preview.thumbnail((size, size), Image.LANCZOS)
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    preview.save(buffer, 'JPEG', quality=50)
+    return 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+def _replace_image(post_id, name, new_name, image_placeholder):
+    """Подменяет картинку поста, если её не сменили за время обработки.
+
+    Пост сохраняется через save(): сигналы сбросят кэш страниц
+    и даты изменения, где видна картинка.
+    """
+    with transaction.atomic():
+        # Блокируется только строка поста: PostgreSQL не даёт
+        # FOR UPDATE для группы, присоединённой LEFT JOIN
+        post = Post.objects.select_for_update(of=('self',)).select_related(
+            'author', 'group'
+        ).filter(pk=post_id, image=name).first()
+        if post is None:
+            return False
+        post.image = new_name
+        post.image_placeholder = image_placeholder
+        post.save(update_fields=['image', 'image_placeholder', 'updated'])
+    return True
+
+
+def process_upload(post_id, name):
+    """Нормализует загруженную картинку поста, сохраняет заглушку
+    и строит превью.
+
+    Возвращает True, если всё готово.
+    """
+    try:
+        with default_storage.open(name) as source, \
+                Image.open(source) as image:
+            new_name = name
+            normalized = normalize(image)
+            if normalized is not None:
+                image, format = normalized
+                new_name = default_storage.save(
+                    os.path.splitext(name)[0] + EXTENSIONS[format],
+                    ContentFile(encode(image, format)),
+                )
+            image_placeholder = placeholder(image)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+        return False
+    if not _replace_image(post_id, name, new_name, image_placeholder):
+        # Пост удалили или сменили ему картинку
+        if new_name != name:
+            default_storage.delete(new_name)
+        return False
+    if new_name != name:
+        # Исходник больше не нужен, вместе с ним уходят его превью
+        delete(name)
+    return generate_renditions(new_name)
+
+
+def _process_in_worker(post_id, name):
+    try:
+        return process_upload(post_id, name)
+    finally:
+        # У каждого потока своё соединение с базой
+        connection.close()
+
+
+def _pool_available():
+    """Может ли фоновый поток работать с базой параллельно запросу.
+
+    База SQLite в памяти (тестовая) доступна другим потокам только
+    через общий кэш, где блокировки таблиц не ждут, а сразу дают
+    «database table is locked». С ней картинки обрабатываются
+    в запросе.
+    """
+    if not settings.POST_IMAGE_WORKERS:
+        return False
+    return not (
+        connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    )
+
+
+def schedule_processing(post):
+    """Ставит обработку картинки поста в фоновый пул.
+
+    Задача уходит в пул после коммита транзакции, чтобы поток
+    не ждал блокировки базы, которую держит запрос, и видел пост.
+    Запрос только сохраняет загруженный файл. При POST_IMAGE_WORKERS = 0
+    и с базой SQLite в памяти картинка обрабатывается сразу.
+    """
+    if not post.image:
+        return
+    post_id, name = post.pk, post.image.name
+    if not _pool_available():
+        process_upload(post_id, name)
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_process_in_worker, post_id, name)
+    )
@@ -0,0 +1,132 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import benchmark
+from posts.models import Comment, Follow, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет p50/p95 времени ответа и число запросов к базе '
+        'для каждого URL приложения posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=30,
+            help='Сколько замеров делать для каждого URL.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Сколько прогревочных запросов не учитывать.',
+        )
+        parser.add_argument(
+            '--templates',
+            action='store_true',
+            help=(
+                'Сравнить отрисовку ленты без кэша шаблонов и карточек '
+                'и с ним вместо замера URL.'
+            ),
+        )
+        parser.add_argument(
+            '--concurrency',
+            help=(
+                'Уровни параллельности через запятую, например 1,4,16: '
+                'замерить пропускную способность страниц чтения '
+                'с параллельным чтением запросов страницы и без него.'
+            ),
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл, куда сохранить результаты в JSON.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        if options['templates']:
+            self.measure_templates(options)
+            return
+        if options['concurrency']:
+            self.measure_concurrency(options)
+            return
+        results = benchmark.measure(
+            benchmark.build_cases(), options['requests'], options['warmup']
+        )
+        report = {
+            'created': timezone.now().isoformat(),
+            'requests': options['requests'],
+            'dataset': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'results': results,
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<24} {result["status"]} '
+                f'p50 {result["p50_ms"]:>8} мс  '
+                f'p95 {result["p95_ms"]:>8} мс  '
+                f'запросов {result["queries"]}'
+            )
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)['results']
+            self.stdout.write('\nСравнение p95 с прошлым прогоном:')
+            for row in benchmark.compare(baseline, results):
+                self.stdout.write(
+                    '{:<24} {:>8} -> {:>8} мс ({:+}%)  '
+                    'запросов {} -> {}'.format(*row)
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Результаты сохранены в {options["output"]}'
+            ))
+
+    def measure_templates(self, options):
+        results = benchmark.measure_templates(
+            options['requests'], options['warmup']
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<24} p50 {result["p50_ms"]:>8} мс  '
+                f'p95 {result["p95_ms"]:>8} мс'
+            )
+        before, after = results['uncached'], results['cached']
+        if after['p50_ms']:
+            self.stdout.write(
+                f'Ускорение p50: {before["p50_ms"] / after["p50_ms"]:.1f}x'
+            )
+        if not after['same_html']:
+            self.stderr.write('Страницы с кэшем и без него различаются')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+    def measure_concurrency(self, options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        results = benchmark.measure_concurrency(
+            benchmark.build_cases(), levels, options['requests']
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<32} {result["rps"]:>8} запр/с  '
+                f'p50 {result["p50_ms"]:>8} мс  '
+                f'p95 {result["p95_ms"]:>8} мс  '
+                f'ошибок {result["errors"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в NDJSON или CSV, не держа их в памяти.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки (по умолчанию - стандартный вывод).',
+        )
+        parser.add_argument(
+            '--format',
+            choices=transfer.FORMATS,
+            default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов читать из базы за раз.',
+        )
+        parser.add_argument(
+            '--media-dir',
+            help='Каталог, куда скопировать картинки постов.',
+        )
+
+    def handle(self, *args, **options):
+        rows = transfer.export_rows(options['batch_size'])
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as file:
+                transfer.write_rows(rows, file, options['format'])
+        else:
+            transfer.write_rows(rows, sys.stdout, options['format'])
+        if options['media_dir']:
+            names = Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).iterator(chunk_size=options['batch_size'])
+            copied = transfer.export_images(names, options['media_dir'])
+            self.stderr.write(f'Картинок скопировано: {copied}')
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из NDJSON или CSV порциями bulk_create. '
+        'Авторы и группы ищутся по username и slug.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл выгрузки или «-» для стандартного ввода.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=transfer.FORMATS,
+            default='ndjson',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов создавать одним запросом.',
+        )
+        parser.add_argument(
+            '--media-dir',
+            help='Каталог с картинками из export_posts --media-dir.',
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(
+            options['batch_size'], options['media_dir']
+        )
+        if options['path'] == '-':
+            importer.run(transfer.read_rows(sys.stdin, options['format']))
+        else:
+            with open(
+                options['path'], encoding='utf-8', newline=''
+            ) as file:
+                importer.run(transfer.read_rows(file, options['format']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {importer.imported}, '
+            f'пропущено: {importer.skipped}'
+        ))
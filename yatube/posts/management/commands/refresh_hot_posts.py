@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает места в ленте популярного для постов, '
+        'изменившихся с прошлого запуска. Запускается по cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов пересчитывать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        refreshed = trending.refresh(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано постов: {refreshed}')
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmark
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Наполняет пустую базу данными для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 10000, 'Число пользователей.'),
+            ('posts', 100000, 'Число постов.'),
+            ('comments', 1000000, 'Число комментариев.'),
+            ('groups', 50, 'Число групп.'),
+            ('follows', 20, 'Среднее число подписок пользователя.'),
+            ('batch-size', 5000, 'Сколько строк вставлять за раз.'),
+            ('seed', 0, 'Зерно генератора: одно зерно - одни данные.'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+
+    def handle(self, *args, **options):
+        if Post.objects.exists():
+            raise CommandError(
+                'В базе уже есть посты: данные для замеров '
+                'наполняются в отдельную пустую базу.'
+            )
+        created = benchmark.seed(
+            users=options['users'],
+            posts=options['posts'],
+            comments=options['comments'],
+            groups=options['groups'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {count}' for name, count in created.items()
+        )))
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import images
+from posts.models import Post
+
+
+def _warm(name):
+    try:
+        return images.generate_renditions(name)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Строит превью для картинок уже опубликованных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число параллельных потоков (0 - в текущем потоке).',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).iterator()
+        pool = ThreadPoolExecutor(max_workers=workers) if workers else None
+        # Задачи отдаются пулу порциями, чтобы не держать в памяти
+        # очередь на все картинки сразу
+        chunk_size = max(workers, 1) * 50
+        processed = failed = 0
+        chunk = list(islice(names, chunk_size))
+        while chunk:
+            if pool is None:
+                results = [images.generate_renditions(n) for n in chunk]
+            else:
+                results = list(pool.map(_warm, chunk))
+            processed += len(results)
+            failed += results.count(False)
+            chunk = list(islice(names, chunk_size))
+        if pool is not None:
+            pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок обработано: {processed}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,28 @@
+"""Полнотекстовый индекс постов.
+
+SQL индекса и триггеров лежит в posts.fts. Любая следующая миграция,
+которая меняет таблицы posts_post или posts_group (AddField,
+AlterField, RemoveField и прочие операции, пересоздающие таблицу
+на SQLite), обязана обернуть свои операции в fts.without_triggers():
+иначе SQLite не сможет переименовать пересозданную таблицу, на которую
+ссылаются триггеры индекса.
+"""
+from django.db import migrations
+
+from posts import fts
+
+FORWARD = [fts.CREATE_TABLE, *fts.CREATE_TRIGGERS, fts.FILL]
+BACKWARD = [*fts.DROP_TRIGGERS, fts.DROP_TABLE]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            fts.run_sqlite(FORWARD), fts.run_sqlite(BACKWARD)
+        ),
+    ]
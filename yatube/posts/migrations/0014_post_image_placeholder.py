@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+from posts import fts
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_last_modified'),
+    ]
+
+    # SQLite пересоздаёт posts_post (см. 0011)
+    operations = fts.without_triggers(
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Заглушка картинки'),
+        ),
+    )
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='feed_seen',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Лента подписок просмотрена'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Непрочитанных постов'),
+        ),
+    ]
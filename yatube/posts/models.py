@@ -21,11 +21,54 @@ class Group(models.Model):
         verbose_name='Описание сообщества',
         help_text='Описание-тема группы',
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+    posts_updated = models.DateTimeField(
+        verbose_name='Дата изменения постов группы',
+        null=True,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Запросы к постам, общие для всех лент."""
+
+    # Поля, которые шаблоны лент читают у поста и автора;
+    # группы подставляются из справочника posts.groups
+    FEED_FIELDS = (
+        'text',
+        'pub_date',
+        'image',
+        'image_placeholder',
+        'group',
+        'updated',
+        'author__username',
+    )
+
+    def with_groups(self):
+        """Группы постов подставляются из справочника, без JOIN."""
+        # Справочник групп сам читает модели этого модуля
+        from .groups import WithGroups
+
+        posts = self.all()
+        posts._iterable_class = WithGroups
+        return posts
+
+    def feed(self):
+        """Посты для ленты: автор приходит одним JOIN, группа
+        из справочника, лишние колонки не читаются.
+        """
+        return self.select_related('author').only(
+            *self.FEED_FIELDS
+        ).with_groups()
+
+
 class Post(models.Model):
     """Модель для хранения всех постов."""
 
@@ -57,11 +100,43 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    # Размытая копия картинки (data: URI), видна до загрузки превью
+    image_placeholder = models.TextField(
+        verbose_name='Заглушка картинки',
+        blank=True,
+        editable=False,
+    )
+    # Меняется и при изменении комментариев поста
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = [
             '-pub_date',
         ]
+        indexes = [
+            models.Index(
+                fields=['pub_date'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx',
+            ),
+            # Посты, изменившиеся после прошлого пересчёта популярного
+            models.Index(
+                fields=['updated'],
+                name='post_updated_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -97,6 +172,12 @@ class Comment(models.Model):
         ordering = [
             '-created',
         ]
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -115,6 +196,10 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Подписан на автора',
     )
+    created = models.DateTimeField(
+        verbose_name='Дата подписки',
+        auto_now_add=True,
+    )
 
     class Meta:
         constraints = [
@@ -126,3 +211,149 @@ class Follow(models.Model):
                 name='unique_follow',
             ),
         ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации поста',
+    )
+
+    class Meta:
+        ordering = [
+            '-pub_date',
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'post',
+                ],
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date', 'post'],
+                name='timeline_user_feed_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживают сигналы."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Число постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Число подписок',
+        default=0,
+    )
+    # Последнее изменение профиля: имени, постов автора, подписок
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
+    # Новые посты ленты подписок с прошлого просмотра (posts.unread)
+    unread_count = models.PositiveIntegerField(
+        verbose_name='Непрочитанных постов',
+        default=0,
+    )
+    feed_seen = models.DateTimeField(
+        verbose_name='Лента подписок просмотрена',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class PostStats(models.Model):
+    """Счётчики поста, которые поддерживают сигналы."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пост',
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Число комментариев',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.comments_count}'
+
+
+class PostScore(models.Model):
+    """Место поста в ленте популярного, см. posts.trending."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост',
+    )
+    # Дата публикации, сдвинутая вперёд комментариями
+    # и подписчиками автора: чем позже, тем выше пост
+    hot_date = models.DateTimeField(
+        verbose_name='Горячая дата',
+    )
+    # Подписчики автора при первом расчёте, то есть вскоре
+    # после публикации: новые подписки старые посты не двигают
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Число подписчиков автора',
+        default=0,
+    )
+    # Когда считалась: посты, изменённые позже, пересчитываются
+    computed = models.DateTimeField(
+        verbose_name='Дата расчёта',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['hot_date', 'post'],
+                name='postscore_hot_idx',
+            ),
+            models.Index(
+                fields=['computed'],
+                name='postscore_computed_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.hot_date}'
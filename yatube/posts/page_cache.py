@@ -0,0 +1,118 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Страница зависит от набора областей (scope): лента, группа, автор,
+пост. У каждой области в кэше лежит версия — случайный токен,
+который меняется при любом изменении её данных. Вместе со страницей
+сохраняются версии, с которыми она собрана; при чтении страница
+отдаётся, только если все версии совпадают с текущими.
+
+При SHARED_PAGES страница собирается как для гостя и отдаётся
+из кэша всем, включая вошедших: личные части они догружают
+отдельно (см. core.personal).
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import parse_http_date_safe
+
+FEED = ('feed', 'all')
+GROUPS = ('groups', 'all')
+FOLLOWS = ('follows', 'all')
+HOT = ('hot', 'all')
+
+
+def _version_key(scope):
+    return 'version:{}:{}'.format(*scope)
+
+
+def get_versions(scopes):
+    """Текущие версии областей; недостающие заводятся заново."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, uuid.uuid4().hex, None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+def bump(*scopes):
+    """Меняет версии областей, устаревшие страницы перестают читаться."""
+    cache.set_many(
+        {_version_key(scope): uuid.uuid4().hex for scope in scopes}, None
+    )
+
+
+def depend_on(request, *scopes):
+    """Добавляет области, найденные в ходе работы view."""
+    versions = getattr(request, '_page_cache_versions', None)
+    if versions is not None:
+        versions.update(get_versions(scopes))
+
+
+def _is_cacheable(request):
+    return (
+        settings.PAGE_CACHE_TIMEOUT
+        and request.method in ('GET', 'HEAD')
+        and (settings.SHARED_PAGES or not request.user.is_authenticated)
+    )
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{request.method}:{path}'
+
+
+def cache_anonymous_page(get_scopes):
+    """Кэширует ответ view для анонимных посетителей.
+
+    get_scopes получает аргументы view из URL и возвращает области,
+    от которых зависит страница.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view(request, *args, **kwargs)
+            if settings.SHARED_PAGES:
+                # Сессия не читается: ответ не получит Vary: Cookie
+                request.user = AnonymousUser()
+                request.shared_page = True
+            key = _page_key(request)
+            entry = cache.get(key)
+            if entry is not None:
+                response, versions = entry
+                if cache.get_many(versions.keys()) == versions:
+                    # Валидаторы сохранены вместе со страницей
+                    return get_conditional_response(
+                        request,
+                        etag=response.get('ETag'),
+                        last_modified=parse_http_date_safe(
+                            response.get('Last-Modified', '')
+                        ),
+                        response=response,
+                    )
+            versions = get_versions([GROUPS, *get_scopes(**kwargs)])
+            request._page_cache_versions = versions
+            response = view(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_USED')
+            ):
+                if settings.SHARED_PAGES:
+                    patch_cache_control(
+                        response, public=True,
+                        max_age=settings.SHARED_PAGE_MAX_AGE,
+                    )
+                cache.set(
+                    key, (response, versions), settings.PAGE_CACHE_TIMEOUT
+                )
+            return response
+        return wrapper
+    return decorator
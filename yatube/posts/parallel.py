@@ -0,0 +1,115 @@
+"""Параллельное чтение независимых запросов страницы.
+
+Django 2.2 не умеет ни ASGI, ни асинхронного ORM, поэтому запросы
+страницы, которые не зависят друг от друга (число постов, строки
+страницы, подписки читателя), выполняются в общем пуле потоков.
+Страница тогда ждёт самый долгий из них, а не их сумму.
+
+У каждого потока пула своё соединение с базой; вокруг задачи
+close_old_connections() закрывает его по CONN_MAX_AGE, как это делает
+обработчик запроса. Пул не используется при PAGE_QUERY_WORKERS = 0,
+внутри транзакции (потоки не видят её незафиксированных изменений)
+и на базе SQLite в памяти: там запросы выполняются по очереди.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import close_old_connections, connection
+
+from . import utils
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PAGE_QUERY_WORKERS,
+                thread_name_prefix='page-queries',
+            )
+        return _executor
+
+
+def shutdown():
+    """Останавливает пул; соединения его потоков закрываются с ними."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def available():
+    """Можно ли сейчас читать из базы в потоках пула."""
+    if not settings.PAGE_QUERY_WORKERS or connection.in_atomic_block:
+        return False
+    # В общем кэше SQLite в памяти блокировки таблиц не ждут
+    return not (
+        connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    )
+
+
+def _run(call):
+    close_old_connections()
+    try:
+        return call()
+    finally:
+        close_old_connections()
+
+
+def gather(*calls):
+    """Результаты вызовов calls в их порядке.
+
+    Первый вызов выполняется в потоке запроса, остальные в пуле.
+    Исключение любого вызова пробрасывается после того,
+    как завершатся все.
+    """
+    if len(calls) < 2 or not available():
+        return [call() for call in calls]
+    executor = _get_executor()
+    futures = [executor.submit(_run, call) for call in calls[1:]]
+    try:
+        first = calls[0]()
+    finally:
+        wait(futures)
+    return [first] + [future.result() for future in futures]
+
+
+def _page_number(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def paginate(request, queryset, *calls):
+    """Страница ленты, как utils.paginate, и результаты calls.
+
+    Для страниц ?page=N число постов и строки страницы читаются
+    одновременно: номер страницы проверяется уже по числу постов,
+    и если он был вне диапазона, строки читаются заново.
+    Страница по курсору - один запрос, он идёт рядом с calls.
+    """
+    if 'cursor' in request.GET or (
+        settings.POSTS_CURSOR_PAGINATION and 'page' not in request.GET
+    ):
+        return gather(lambda: utils.paginate(request, queryset), *calls)
+    per_page = settings.POSTS_PER_PAGE
+    page = request.GET.get('page')
+    bottom = (_page_number(page) - 1) * per_page
+    count, rows, *results = gather(
+        queryset.count,
+        lambda: list(queryset[bottom:bottom + per_page]),
+        *calls,
+    )
+    paginator = Paginator(queryset, per_page)
+    paginator.count = count
+    page_obj = paginator.get_page(page)
+    if (page_obj.number - 1) * per_page == bottom:
+        page_obj.object_list = rows
+    return [page_obj] + results
@@ -0,0 +1,112 @@
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from . import fts
+from .models import Post
+
+# Маркеры подсветки: символы, которых нет в тексте постов,
+# заменяются на <mark> уже после экранирования HTML
+MARK_START = '\x02'
+MARK_END = '\x03'
+# Веса колонок для bm25: текст поста, название и описание группы
+RANK = 'bm25(posts_post_fts, 10.0, 4.0, 1.0)'
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово ищется как отдельная фраза с префиксным
+    совпадением, операторы FTS5 из ввода не интерпретируются.
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Ранжированная выдача поиска для Paginator.
+
+    Paginator берёт число результатов через count()
+    и читает страницу срезом: каждый срез — один запрос
+    с LIMIT/OFFSET к индексу.
+    """
+
+    def __init__(self, query):
+        self.match = build_match(query)
+
+    def count(self):
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM posts_post_fts '
+                'WHERE posts_post_fts MATCH %s',
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = index.stop - start
+        if not self.match or limit <= 0:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid, snippet(posts_post_fts, 0, %s, %s, %s, 24) '
+                'FROM posts_post_fts WHERE posts_post_fts MATCH %s '
+                f'ORDER BY {RANK} LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', self.match, limit, start],
+            )
+            rows = cursor.fetchall()
+        posts = Post.objects.feed().in_bulk([pk for pk, _ in rows])
+        results = []
+        for pk, snippet in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+def search(query):
+    """Посты, подходящие под запрос, от более релевантных к менее."""
+    if is_available():
+        return SearchResults(query)
+    # Без FTS5 остаётся поиск подстрокой
+    return Post.objects.feed().filter(
+        Q(text__icontains=query)
+        | Q(group__title__icontains=query)
+        | Q(group__description__icontains=query)
+    )
+
+
+def rebuild():
+    """Пересобирает индекс по текущим постам и группам."""
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_post_fts')
+        cursor.execute(fts.FILL)
+        indexed = cursor.rowcount
+        cursor.execute(
+            "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('optimize')"
+        )
+    return indexed
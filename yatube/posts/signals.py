@@ -0,0 +1,161 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import conditional, counters, page_cache, timeline, unread
+from .models import Comment, Follow, Group, Post, PostStats, User, UserStats
+
+
+def post_scopes(post):
+    """Области кэша страниц, в которых виден пост."""
+    scopes = [
+        page_cache.FEED,
+        ('post', post.pk),
+        ('author', post.author.username),
+    ]
+    if post.group_id:
+        scopes.append(('group', post.group.slug))
+    return scopes
+
+
+def _is_login(update_fields):
+    return update_fields == frozenset({'last_login'})
+
+
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, raw=False, update_fields=None,
+                  **kwargs):
+    """Запоминает имя до правки: страницы со старым именем устареют."""
+    if instance.pk and not raw and not _is_login(update_fields):
+        instance._old_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    """Заводит счётчики нового пользователя."""
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+    if _is_login(kwargs.get('update_fields')):
+        return
+    page_cache.bump(('author', instance.username))
+    if not created:
+        conditional.touch_user(instance.pk)
+    old_username = getattr(instance, '_old_username', None)
+    if old_username and old_username != instance.username:
+        username_changed(instance, old_username)
+
+
+def username_changed(user, old_username):
+    """Имя автора видно в карточках его постов на всех лентах,
+    в группах, на страницах постов и в списке подписок, а имя
+    комментатора - на страницах прокомментированных постов.
+    """
+    group_slugs = Group.objects.filter(
+        posts__author=user
+    ).values_list('slug', flat=True).distinct()
+    post_ids = set(
+        Post.objects.filter(author=user).values_list('pk', flat=True)
+    ) | set(
+        Comment.objects.filter(author=user).values_list('post_id', flat=True)
+    )
+    page_cache.bump(
+        ('author', old_username),
+        page_cache.FEED,
+        page_cache.FOLLOWS,
+        *[('group', slug) for slug in group_slugs],
+        *[('post', pk) for pk in post_ids],
+    )
+    # Карточки постов и ETag страниц постов строятся по дате
+    # изменения поста
+    conditional.touch_posts(pk__in=post_ids)
+    conditional.touch_group_posts(posts__author=user)
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, raw=False, **kwargs):
+    """Запоминает группу поста до правки: её страница тоже устареет."""
+    if instance.pk and not raw:
+        instance._old_group_slug = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group__slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков
+    и обновляет счётчики.
+    """
+    if raw:
+        return
+    scopes = post_scopes(instance)
+    old_group_slug = getattr(instance, '_old_group_slug', None)
+    if old_group_slug:
+        scopes.append(('group', old_group_slug))
+        conditional.touch_group_posts(slug=old_group_slug)
+    page_cache.bump(*scopes)
+    conditional.touch_user(instance.author_id)
+    if instance.group_id:
+        conditional.touch_group_posts(pk=instance.group_id)
+    if created:
+        PostStats.objects.create(post=instance)
+        counters.change_user(instance.author_id, 'posts_count', 1)
+        timeline.publish(instance)
+        unread.publish(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    page_cache.bump(*post_scopes(instance))
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    unread.unpublish(instance)
+    conditional.touch_user(instance.author_id)
+    if instance.group_id:
+        conditional.touch_group_posts(pk=instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 'comments_count', 1)
+    page_cache.bump(('post', instance.post_id))
+    conditional.touch_post(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, 'comments_count', -1)
+    page_cache.bump(('post', instance.post_id))
+    conditional.touch_post(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """Дополняет ленту подписчика постами нового автора."""
+    if created and not raw:
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        counters.change_user(instance.user_id, 'following_count', 1)
+        page_cache.bump(
+            ('author', instance.author.username), page_cache.FOLLOWS
+        )
+        conditional.touch_user(instance.author_id, instance.user_id)
+        timeline.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Убирает посты автора из ленты отписавшегося."""
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    counters.change_user(instance.user_id, 'following_count', -1)
+    page_cache.bump(
+        ('author', instance.author.username), page_cache.FOLLOWS
+    )
+    conditional.touch_user(instance.author_id, instance.user_id)
+    timeline.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Название и slug группы видны на всех страницах."""
+    page_cache.bump(page_cache.GROUPS, page_cache.FEED)
@@ -0,0 +1,37 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_key(post):
+    return f'post_card:{post.pk}:{post.updated.timestamp()}'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Готовит карточки постов страницы: post.card - готовый HTML.
+
+    Карточка не зависит от пользователя, поэтому кэшируется по
+    (id поста, дата изменения). Карточки страницы читаются из кэша
+    одним get_many, отрисовываются только недостающие.
+    """
+    posts = list(posts)
+    keys = {card_key(post): post for post in posts}
+    cached = cache.get_many(keys) if settings.POST_CARD_TIMEOUT else {}
+    card_template = context.template.engine.get_template(CARD_TEMPLATE)
+    rendered = {}
+    for key, post in keys.items():
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = card_template.render(
+                template.Context({'post': post}, autoescape=context.autoescape)
+            )
+        post.card = mark_safe(html)
+    if rendered and settings.POST_CARD_TIMEOUT:
+        cache.set_many(rendered, settings.POST_CARD_TIMEOUT)
+    return ''
@@ -0,0 +1,14 @@
+from django import template
+
+from posts import groups
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/group_sidebar.html')
+def group_sidebar(current=None):
+    """Список сообществ из справочника групп."""
+    return {
+        'groups': groups.list_groups(),
+        'current': current,
+    }
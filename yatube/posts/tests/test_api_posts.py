@@ -0,0 +1,185 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def read_json(response):
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return response.json()
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост №{i}', author=cls.author,
+                 group=cls.group if i % 2 else None)
+            for i in range(5)
+        ])
+        cls.post = Post.objects.latest('pk')
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.reader, text=f'Комментарий {i}')
+            for i in range(3)
+        ])
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def walk(self, url, **params):
+        """Проходит список по курсорам и возвращает все элементы."""
+        items, cursor = [], ''
+        while cursor is not None:
+            response = self.client.get(url, {**params, 'cursor': cursor})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            data = read_json(response)
+            items.extend(data['results'])
+            cursor = data['next_cursor']
+        return items
+
+    def test_post_list_walks_all_posts(self):
+        """Курсоры отдают все посты от новых к старым без повторов."""
+        posts = self.walk(reverse('api:post_list'))
+        self.assertEqual(
+            [post['id'] for post in posts],
+            list(Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)),
+        )
+        self.assertEqual(posts[0]['author'], 'Author')
+
+    def test_post_list_filters(self):
+        """Список постов фильтруется по группе и автору."""
+        posts = self.walk(reverse('api:post_list'), group='test-slug')
+        self.assertEqual(len(posts), 2)
+        self.assertTrue(all(post['group'] == 'test-slug' for post in posts))
+        self.assertEqual(
+            self.walk(reverse('api:post_list'), author='Reader'), []
+        )
+
+    def test_post_detail(self):
+        """Пост отдаётся по id, несуществующий - 404."""
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(read_json(response)['text'], self.post.text)
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_groups_and_follows(self):
+        """Комментарии, группы и подписки листаются так же."""
+        comments = self.walk(reverse(
+            'api:comment_list', kwargs={'post_id': self.post.pk}
+        ))
+        self.assertEqual(len(comments), 3)
+        self.assertEqual(comments[0]['author'], 'Reader')
+        groups = self.walk(reverse('api:group_list'))
+        self.assertEqual([group['slug'] for group in groups], ['test-slug'])
+        follows = self.walk(reverse('api:follow_list'), user='Reader')
+        self.assertEqual(
+            follows,
+            [{'id': follows[0]['id'], 'user': 'Reader', 'author': 'Author'}],
+        )
+
+    def test_etag_not_modified(self):
+        """Повтор с If-None-Match получает 304 без запросов к базе."""
+        url = reverse('api:post_list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_data(self):
+        """После нового поста и новой подписки ETag меняется."""
+        for url, change in (
+            (reverse('api:post_list'), lambda: Post.objects.create(
+                text='Новый пост', author=self.reader)),
+            (reverse('api:follow_list'), lambda: Follow.objects.create(
+                user=self.author, author=self.reader)),
+        ):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_username(self):
+        """Смена имени автора меняет ETag постов и подписок."""
+        urls = (reverse('api:post_list'), reverse('api:follow_list'))
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'Renamed'
+        author.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Renamed', json.dumps(
+                    read_json(response), ensure_ascii=False
+                ))
+
+    def test_post_etags_change_with_names(self):
+        """ETag поста и его комментариев меняется после смены имени
+        автора, комментатора и slug группы.
+        """
+        post = Post.objects.filter(group=self.group).latest('pk')
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        detail = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        comments = reverse('api:comment_list', kwargs={'post_id': post.pk})
+
+        def rename(model, pk, **fields):
+            def change():
+                instance = model.objects.get(pk=pk)
+                for name, value in fields.items():
+                    setattr(instance, name, value)
+                instance.save()
+            return change
+
+        for url, change, expected in (
+            (detail, rename(User, self.author.pk, username='NewAuthor'),
+             'NewAuthor'),
+            (detail, rename(Group, self.group.pk, slug='new-slug'),
+             'new-slug'),
+            (comments, rename(User, self.reader.pk, username='NewReader'),
+             'NewReader'),
+        ):
+            with self.subTest(url=url, expected=expected):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(
+                    self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    ).status_code,
+                    304,
+                )
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(expected, json.dumps(
+                    read_json(response), ensure_ascii=False
+                ))
+
+    def test_read_only(self):
+        """API не принимает запросы на запись."""
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+
+from .. import benchmark
+from ..models import Comment, Follow, Post, TimelineEntry, UserStats
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created = benchmark.seed(
+            users=20, posts=60, comments=200, groups=3, follows=4,
+            batch_size=50,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_fills_database(self):
+        """seed создаёт данные и пересобирает производные таблицы."""
+        self.assertEqual(self.created['users'], 20)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(UserStats.objects.count(), 20)
+
+    def test_seed_keeps_dates(self):
+        """Даты постов разбросаны, а не равны времени вставки."""
+        dates = set(Post.objects.values_list('pub_date', flat=True))
+        self.assertEqual(len(dates), 60)
+        for comment in Comment.objects.select_related('post')[:20]:
+            self.assertGreaterEqual(comment.created, comment.post.pub_date)
+
+    def test_measure_covers_every_url(self):
+        """Замеры есть для каждого URL, записи откатываются."""
+        comments = Comment.objects.count()
+        results = benchmark.measure(
+            benchmark.build_cases(), requests=2, warmup=0
+        )
+        self.assertEqual(Comment.objects.count(), comments)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertIn(result['status'], (200, 302))
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertIsInstance(result['queries'], int)
+
+    def test_measure_templates(self):
+        """Кэши шаблонов и карточек не меняют страницу ленты."""
+        results = benchmark.measure_templates(requests=2, warmup=1)
+        self.assertEqual(set(results), {'uncached', 'cached'})
+        self.assertTrue(results['cached']['same_html'])
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_percentile(self):
+        """Перцентиль интерполирует между соседними значениями."""
+        values = [1, 2, 3, 4, 5]
+        self.assertEqual(benchmark.percentile(values, 50), 3)
+        self.assertEqual(benchmark.percentile(values, 95), 4.8)
+        self.assertEqual(benchmark.percentile([7], 95), 7)
+
+    def test_compare(self):
+        """Сравнение показывает изменение p95 и числа запросов."""
+        baseline = {'index/guest': {'p95_ms': 10.0, 'queries': 3}}
+        results = {
+            'index/guest': {'p95_ms': 5.0, 'queries': 2},
+            'search/guest': {'p95_ms': 1.0, 'queries': 1},
+        }
+        self.assertEqual(
+            benchmark.compare(baseline, results),
+            [('index/guest', 10.0, 5.0, -50.0, 3, 2)],
+        )
+
+
+class ConcurrencyBenchmarkTests(TransactionTestCase):
+    # Потоки открывают свои соединения и видят только
+    # закоммиченные данные, поэтому без транзакции теста
+    def setUp(self):
+        cache.clear()
+        benchmark.seed(
+            users=10, posts=20, comments=30, groups=2, follows=3,
+            batch_size=50,
+        )
+
+    def test_measure_concurrency(self):
+        """Страницы чтения замеряются на каждом уровне параллельности."""
+        results = benchmark.measure_concurrency(
+            benchmark.build_cases(), levels=(1, 2), requests=4
+        )
+        self.assertEqual(
+            set(results),
+            {
+                f'{name}@{level}/{mode}'
+                for name in benchmark.READ_ONLY_CASES for level in (1, 2)
+                for mode in benchmark.CONCURRENCY_MODES
+            },
+        )
+        for result in results.values():
+            self.assertEqual(result['requests'], 4)
+            self.assertEqual(result['errors'], 0)
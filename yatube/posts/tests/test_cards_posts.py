@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..templatetags.card_tags import card_key
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        cls.url = reverse('posts:profile', kwargs={'username': 'Author'})
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_card_served_from_cache(self):
+        """Отрисованная карточка кладётся в кэш и берётся оттуда."""
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Тестовый пост')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertIn('Тестовый пост', cache.get(card_key(post)))
+        cache.set(card_key(post), '<article>Из кэша</article>')
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Из кэша')
+        self.assertTemplateNotUsed(response, 'includes/post_card.html')
+
+    def test_edited_post_gets_new_card(self):
+        """После правки поста карточка отрисовывается заново."""
+        self.authorized_client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Исправленный пост'},
+        )
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertNotContains(response, 'Тестовый пост')
+
+    @override_settings(POST_CARD_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """При POST_CARD_TIMEOUT=0 карточки не кэшируются."""
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Тестовый пост')
+        self.assertIsNone(cache.get(card_key(self.post)))
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import comment_buffer, counters
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    COMMENT_BUFFER_SIZE=2, COMMENT_BUFFER_SECONDS=0, COMMENT_BUFFER_JOURNAL=''
+)
+class CommentBufferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(
+            comment_buffer, 'buffer', comment_buffer.CommentBuffer()
+        )
+        self.buffer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def comment(self, text):
+        return self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': text},
+        )
+
+    def test_comments_saved_in_batches(self):
+        """Комментарии пишутся в базу, когда набирается порция."""
+        self.comment('Первый')
+        self.assertFalse(Comment.objects.exists())
+        self.comment('Второй')
+        self.assertEqual(
+            set(Comment.objects.values_list('text', flat=True)),
+            {'Первый', 'Второй'},
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(counters.post_stats(post).comments_count, 2)
+
+    def test_author_reads_own_pending_comments(self):
+        """Автор видит свой комментарий до записи, остальные - нет."""
+        response = self.reader_client.get(self.url)
+        self.comment('Ждёт записи')
+        response = self.reader_client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertContains(response, 'Ждёт записи')
+        self.assertNotContains(self.author_client.get(self.url), 'Ждёт записи')
+        self.buffer.flush()
+        # Сохранённый комментарий показывается один раз
+        self.assertContains(
+            self.reader_client.get(self.url), 'Ждёт записи', count=1
+        )
+
+    def test_comments_to_deleted_posts_dropped(self):
+        """Комментарии к удалённому посту отбрасываются при записи."""
+        post = Post.objects.create(text='Удалится', author=self.author)
+        rows = [
+            {'post': post.pk, 'author': self.reader.pk, 'text': 'Пропадёт'},
+            {'post': self.post.pk, 'author': self.reader.pk, 'text': 'Есть'},
+        ]
+        post.delete()
+        self.assertEqual(comment_buffer.save_comments(rows), 1)
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Есть']
+        )
+
+
+class CommentJournalTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.journal_dir, ignore_errors=True)
+        override = override_settings(
+            COMMENT_BUFFER_SIZE=10,
+            COMMENT_BUFFER_SECONDS=0,
+            COMMENT_BUFFER_JOURNAL=self.journal_dir,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_comment_journaled_before_flush(self):
+        """Комментарий попадает в журнал до записи в базу."""
+        buffer = comment_buffer.CommentBuffer()
+        buffer.add(self.post.pk, self.author.pk, 'В журнале')
+        path = os.path.join(self.journal_dir, f'{os.getpid()}.ndjson')
+        with open(path) as journal:
+            row = json.loads(journal.readline())
+        self.assertEqual(row['text'], 'В журнале')
+        buffer.flush()
+        self.assertEqual(os.path.getsize(path), 0)
+
+    def test_orphan_journal_replayed(self):
+        """Журнал упавшего процесса подхватывается и сохраняется."""
+        row = {
+            'post': self.post.pk, 'author': self.author.pk, 'text': 'Спасён'
+        }
+        path = os.path.join(self.journal_dir, '999999999.ndjson')
+        with open(path, 'w') as journal:
+            journal.write(json.dumps(row) + '\n')
+        buffer = comment_buffer.CommentBuffer()
+        buffer.add(self.post.pk, self.author.pk, 'Новый')
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(
+            set(Comment.objects.values_list('text', flat=True)),
+            {'Спасён', 'Новый'},
+        )
+        self.assertEqual(
+            os.listdir(self.journal_dir), [f'{os.getpid()}.ndjson']
+        )
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.urls = {
+            'post': reverse(
+                'posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': 'Author'}),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': 'test-slug'}),
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.guest_client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_unchanged_pages_not_modified(self):
+        """Неизменившаяся страница отвечает 304 по ETag и по дате."""
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_commenter_rename_changes_post_etag(self):
+        """Смена имени комментатора меняет ETag страницы поста."""
+        commenter = User.objects.create_user(username='Commenter')
+        Comment.objects.create(
+            post=self.post, author=commenter, text='Комментарий'
+        )
+        url = self.urls['post']
+        response = self.authorized_client.get(url)
+        commenter.username = 'RenamedCommenter'
+        commenter.save()
+        response = self.revalidate(url, response, self.authorized_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'RenamedCommenter')
+
+    def test_not_modified_before_rendering(self):
+        """304 обходится одним запросом к базе и без шаблонов."""
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                cache.clear()
+                with self.assertNumQueries(1):
+                    response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_changes_invalidate_validators(self):
+        """Изменения данных страницы меняют её ETag."""
+        changes = (
+            ('post', lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            ('profile', lambda: Follow.objects.create(
+                user=self.reader, author=self.author)),
+            ('profile', lambda: Group.objects.filter(pk=self.group.pk)
+                .first().save()),
+            ('group', lambda: Post.objects.create(
+                text='Новый пост', author=self.reader, group=self.group)),
+            ('group', lambda: Post.objects.filter(
+                group=self.group, author=self.reader).delete()),
+            ('post', lambda: self.author.save()),
+        )
+        for page, change in changes:
+            with self.subTest(page=page):
+                url = self.urls[page]
+                response = self.guest_client.get(url)
+                change()
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 200
+                )
+
+    def test_authorized_validators(self):
+        """Пользователь получает свой ETag и не получает Last-Modified."""
+        url = self.urls['post']
+        guest_response = self.guest_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotEqual(response['ETag'], guest_response['ETag'])
+        self.assertEqual(
+            self.revalidate(
+                url, response, self.authorized_client
+            ).status_code,
+            304,
+        )
+        self.assertEqual(
+            self.revalidate(
+                url, guest_response, self.authorized_client
+            ).status_code,
+            200,
+        )
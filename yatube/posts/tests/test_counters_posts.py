@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, PostStats, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def stats(self, user):
+        return UserStats.objects.get(pk=user.pk)
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            PostStats.objects.get(pk=self.post.pk).comments_count, 1
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        comment.delete()
+        follow.delete()
+        self.assertEqual(
+            PostStats.objects.get(pk=self.post.pk).comments_count, 0
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+
+    def test_recount_fixes_drift(self):
+        """Команда recount исправляет разошедшиеся счётчики."""
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=42)
+        PostStats.objects.all().delete()
+        call_command('recount', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertTrue(PostStats.objects.filter(pk=self.post.pk).exists())
+
+    def test_profile_reads_counters(self):
+        """Профайл показывает число постов из счётчиков."""
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=7)
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'})
+        )
+        self.assertEqual(response.context['count_posts'], 7)
+
+    def test_delete_author_with_content(self):
+        """Каскадное удаление автора не ломается на счётчиках."""
+        author = User.objects.create_user(username='Temporary')
+        post = Post.objects.create(text='Тестовый пост', author=author)
+        Comment.objects.create(post=post, author=self.reader, text='Текст')
+        Follow.objects.create(user=self.reader, author=author)
+        author_pk = author.pk
+        author.delete()
+        self.assertFalse(UserStats.objects.filter(pk=author_pk).exists())
+        self.assertEqual(self.stats(self.reader).following_count, 0)
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+
+from .. import follows
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.reader
+
+    def test_followed_ids_loaded_once_per_request(self):
+        """Проверки по любому числу авторов - один запрос."""
+        with self.assertNumQueries(1):
+            following = follows.is_following(self.request, self.authors)
+            follows.is_following(self.request, [self.authors[1].pk])
+        self.assertEqual(following, {
+            self.authors[0].pk: True,
+            self.authors[1].pk: False,
+            self.authors[2].pk: False,
+        })
+
+    def test_follow_and_unfollow_update_memo(self):
+        """Подписка и отписка правят множество запроса на месте."""
+        follows.followed_ids(self.request)
+        follows.follow(self.request, self.authors[1])
+        follows.unfollow(self.request, self.authors[0])
+        with self.assertNumQueries(0):
+            ids = follows.followed_ids(self.request)
+        self.assertEqual(ids, {self.authors[1].pk})
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.reader).values_list(
+                'author_id', flat=True
+            )),
+            ids,
+        )
+
+    def test_self_follow_refused(self):
+        """На себя подписаться нельзя."""
+        self.assertFalse(follows.follow(self.request, self.reader))
+        self.assertFalse(
+            Follow.objects.filter(user=self.reader, author=self.reader)
+        )
+
+    def test_counts(self):
+        """Число подписчиков и подписок берётся из счётчиков."""
+        reader = User.objects.get(pk=self.reader.pk)
+        author = User.objects.get(pk=self.authors[0].pk)
+        self.assertEqual(follows.counts(reader), (0, 1))
+        self.assertEqual(follows.counts(author), (1, 0))
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups
+from ..forms import PostForm
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_registry_loaded_once(self):
+        """Справочник читается одним запросом и дальше без базы."""
+        with self.assertNumQueries(1):
+            groups.registry()
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get_by_slug('test-slug'), self.group)
+            self.assertEqual(groups.get(self.group.pk), self.group)
+            self.assertIsNone(groups.get_by_slug('missing'))
+
+    def test_registry_copy_expires_with_pages(self):
+        """Копия справочника в кэше живёт PAGE_CACHE_TIMEOUT,
+        а не копится по версиям навсегда.
+        """
+        with self.settings(PAGE_CACHE_TIMEOUT=0):
+            version = groups.registry().version
+        self.assertIsNone(cache.get(f'groups:{version}'))
+
+    def test_group_changes_invalidate_registry(self):
+        """Сохранение и удаление группы обновляют справочник."""
+        groups.registry()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(
+            groups.get_by_slug('test-slug').title, 'Новое название'
+        )
+        group.delete()
+        self.assertIsNone(groups.get_by_slug('test-slug'))
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_posts_take_groups_from_registry(self):
+        """Группы постов ленты подставляются без запросов."""
+        groups.registry()
+        posts = list(Post.objects.feed())
+        with self.assertNumQueries(0):
+            self.assertEqual(posts[0].group.title, self.group.title)
+
+    def test_post_form_choices_without_queries(self):
+        """Выпадающий список групп формы строится без базы."""
+        groups.registry()
+        with self.assertNumQueries(0):
+            html = PostForm().as_p()
+        self.assertIn(self.group.title, html)
+
+    def test_admin_group_dropdown_query_count_constant(self):
+        """Список постов в админке не делает запрос на каждую строку."""
+        admin = User.objects.create_superuser(
+            username='Admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        client.get(url)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        before = count_queries()
+        Post.objects.bulk_create([
+            Post(text=f'Пост №{i}', author=self.author, group=self.group)
+            for i in range(5)
+        ])
+        self.assertEqual(count_queries(), before)
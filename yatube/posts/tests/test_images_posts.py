@@ -0,0 +1,227 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png', size=(100, 50), mode='RGB',
+               format='png', **options):
+    file_obj = BytesIO()
+    Image.new(mode, size=size, color='red').save(file_obj, format, **options)
+    return SimpleUploadedFile(
+        name=name,
+        content=file_obj.getvalue(),
+        content_type=f'image/{format}',
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WORKERS=0)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(
+            os.path.join(TEMP_MEDIA_ROOT, 'cache'), ignore_errors=True
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def thumbnails(self):
+        return [
+            name
+            for _, _, names in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+            for name in names
+        ]
+
+    def test_renditions_built_after_upload(self):
+        """Превью строятся сразу после сохранения картинки."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': make_image()},
+        )
+        self.assertTrue(Post.objects.get(text='Пост с картинкой').image)
+        self.assertEqual(
+            len(self.thumbnails()), len(settings.POST_IMAGE_RENDITIONS)
+        )
+
+    def test_warm_thumbnails_command(self):
+        """Команда warm_thumbnails строит превью для старых постов."""
+        Post.objects.create(
+            text='Старый пост', author=self.author, image=make_image()
+        )
+        self.assertEqual(self.thumbnails(), [])
+        call_command(
+            'warm_thumbnails', workers=0, stdout=open(os.devnull, 'w')
+        )
+        self.assertEqual(
+            len(self.thumbnails()), len(settings.POST_IMAGE_RENDITIONS)
+        )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_WORKERS=0,
+    POST_IMAGE_MAX_SIZE=64,
+    POST_IMAGE_FORMAT='JPEG',
+)
+class UploadProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def upload(self, image):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+        return Post.objects.get(text='Пост с картинкой')
+
+    def test_large_image_downscaled_and_reencoded(self):
+        """Большая картинка уменьшается и перекодируется в JPEG,
+        исходник удаляется.
+        """
+        post = self.upload(make_image(size=(200, 100)))
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertFalse(os.path.exists(
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'photo.png')
+        ))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (64, 32))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+
+    def test_exif_stripped_and_orientation_applied(self):
+        """EXIF удаляется, а картинка поворачивается по его ориентации."""
+        exif = Image.Exif()
+        # Orientation = 6: повернуть на 90° по часовой стрелке
+        exif[0x0112] = 6
+        post = self.upload(make_image(
+            'photo.jpg', size=(60, 30), format='jpeg', exif=exif.tobytes()
+        ))
+        with Image.open(post.image.path) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (30, 60))
+
+    def test_transparent_image_kept_png(self):
+        """Прозрачная картинка не перекодируется в JPEG."""
+        post = self.upload(make_image(size=(200, 100), mode='RGBA'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'PNG')
+            self.assertEqual(image.mode, 'RGBA')
+
+    def test_small_image_in_target_format_kept(self):
+        """Картинка, которая уже подходит, остаётся прежним файлом."""
+        post = self.upload(
+            make_image('small.jpg', size=(40, 20), format='jpeg')
+        )
+        self.assertEqual(post.image.name, 'posts/small.jpg')
+        self.assertTrue(post.image_placeholder)
+
+    def test_replaced_image_not_overwritten(self):
+        """Обработка не трогает пост, которому уже сменили картинку."""
+        post = self.upload(make_image(size=(40, 20)))
+        old_name = default_storage.save('posts/old.png', make_image())
+        files = sorted(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts')))
+        self.assertFalse(images.process_upload(post.pk, old_name))
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        # Перекодированная копия чужой картинки удалена
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts'))), files
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WORKERS=2)
+class BackgroundProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_processed_in_pool_after_commit(self):
+        """Запрос только сохраняет файл: обработка уходит в пул
+        после коммита.
+        """
+        client = Client()
+        client.force_login(self.author)
+        with mock.patch.object(
+            images.transaction, 'on_commit'
+        ) as on_commit, mock.patch.object(
+            images, 'process_upload'
+        ) as process, mock.patch.object(
+            images, '_pool_available', return_value=True
+        ):
+            client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Пост с картинкой', 'image': make_image()},
+            )
+        process.assert_not_called()
+        on_commit.assert_called_once()
+        post = Post.objects.get(text='Пост с картинкой')
+        executor = mock.Mock()
+        with mock.patch.object(images, '_get_executor', return_value=executor):
+            on_commit.call_args[0][0]()
+        executor.submit.assert_called_once_with(
+            images._process_in_worker, post.pk, post.image.name
+        )
+
+    def test_in_memory_database_processed_inline(self):
+        """С базой SQLite в памяти пул не используется."""
+        # Имя тестовой базы известно только после её создания
+        if not (
+            connection.vendor == 'sqlite' and connection.is_in_memory_db()
+        ):
+            self.skipTest('Тестовая база SQLite в памяти')
+        post = Post.objects.create(
+            text='Пост', author=self.author, image=make_image()
+        )
+        with mock.patch.object(
+            images, 'process_upload'
+        ) as process, mock.patch.object(
+            images, '_get_executor'
+        ) as get_executor:
+            images.schedule_processing(post)
+        process.assert_called_once_with(post.pk, post.image.name)
+        get_executor.assert_not_called()
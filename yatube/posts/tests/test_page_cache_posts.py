@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_guest_pages_served_from_cache(self):
+        """Повторный запрос гостя не обращается к базе."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    cached = self.guest_client.get(url)
+                self.assertEqual(cached.content, response.content)
+
+    def test_new_post_invalidates_pages(self):
+        """Новый пост в группе сбрасывает ленту, группу и профайл."""
+        for url in self.urls[:3]:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        )
+        # Список постов главной живёт ещё и во фрагментном кэше шаблона,
+        # поэтому для неё проверяем, что страница собрана заново
+        response = self.guest_client.get(self.urls[0])
+        self.assertTemplateUsed(response, 'posts/index.html')
+        for url in self.urls[1:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Свежий пост')
+
+    def test_comment_invalidates_post_detail(self):
+        """Новый комментарий сбрасывает страницу поста."""
+        url = self.urls[3]
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий'
+        )
+        self.assertContains(self.guest_client.get(url), 'Свежий комментарий')
+
+    def test_username_change_invalidates_pages(self):
+        """Смена имени автора сбрасывает страницы со старым именем."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'Renamed'
+        author.save()
+        # Главная ещё 20 секунд отдаёт фрагментный кэш шаблона
+        response = self.guest_client.get(self.urls[0])
+        self.assertTemplateUsed(response, 'posts/index.html')
+        for url in (self.urls[1], self.urls[3]):
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Renamed')
+
+    def test_commenter_rename_invalidates_post_pages(self):
+        """Смена имени комментатора сбрасывает страницу поста
+        и порцию комментариев.
+        """
+        commenter = User.objects.create_user(username='Commenter')
+        Comment.objects.create(
+            post=self.post, author=commenter, text='Комментарий'
+        )
+        urls = (
+            self.urls[3],
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        commenter.username = 'RenamedCommenter'
+        commenter.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'RenamedCommenter'
+                )
+
+    def test_group_slug_change_invalidates_post_detail(self):
+        """Новый slug группы виден на странице поста."""
+        self.guest_client.get(self.urls[3])
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        self.assertContains(self.guest_client.get(self.urls[3]), 'new-slug')
+
+    def test_authorized_pages_not_cached(self):
+        """Страницы авторизованных пользователей не кэшируются."""
+        url = self.urls[2]
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertTemplateUsed(response, 'posts/profile.html')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        """PAGE_CACHE_TIMEOUT=0 выключает кэш страниц."""
+        self.guest_client.get(self.urls[0])
+        response = self.guest_client.get(self.urls[0])
+        self.assertTemplateUsed(response, 'posts/index.html')
@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..utils import CursorPage, CursorPaginator, decode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост №{i}', author=cls.author)
+            for i in range(13)
+        ])
+        # Все посты созданы в одну секунду: порядок держится на id
+        cls.ordered_ids = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.paginator = CursorPaginator(Post.objects.all(), 5)
+
+    def test_walk_forward_and_back(self):
+        """Курсоры next/prev обходят ленту без пропусков и повторов."""
+        first = self.paginator.get_page(None)
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+        walked = [post.pk for page in (first, second, third)
+                  for post in page]
+        self.assertEqual(walked, self.ordered_ids)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+        back = self.paginator.get_page(third.previous_cursor)
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in second]
+        )
+        self.assertTrue(back.has_next())
+
+    def test_one_query_per_page(self):
+        """Страница по курсору читается одним запросом без COUNT(*)."""
+        first = self.paginator.get_page(None)
+        with self.assertNumQueries(1):
+            self.paginator.get_page(first.next_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный токен возвращает первую страницу."""
+        self.assertIsNone(decode_cursor('не-токен'))
+        page = self.paginator.get_page('bm90LWEtY3Vyc29y')
+        self.assertEqual(page[0].pk, self.ordered_ids[0])
+
+    def test_views_cursor_mode(self):
+        """Параметр cursor включает пагинацию по курсору,
+        а ссылки ?page=N продолжают работать.
+        """
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': ''}
+        )
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, CursorPage)
+        self.assertContains(response, page_obj.next_cursor)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'page': 2}
+        )
+        self.assertIsInstance(response.context['page_obj'], Page)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_mode_by_default(self):
+        """С POSTS_CURSOR_PAGINATION лента без ?page идёт по курсору."""
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'})
+        )
+        self.assertIsInstance(response.context['page_obj'], CursorPage)
+
+
+@override_settings(COMMENTS_PER_PAGE=4)
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(10)
+        ])
+        cls.ordered_ids = list(
+            cls.post.comments.order_by('-created', '-pk').values_list(
+                'pk', flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста только первая порция комментариев."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.pk for comment in comments], self.ordered_ids[:4]
+        )
+        self.assertContains(
+            response,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+            + f'?cursor={comments.next_cursor}',
+        )
+
+    def test_fragment_walks_all_comments(self):
+        """Фрагменты по курсору отдают все комментарии без повторов."""
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        walked, cursor = [], ''
+        while cursor is not None:
+            response = self.guest_client.get(url, {'cursor': cursor})
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            comments = response.context['comments']
+            walked.extend(comment.pk for comment in comments)
+            cursor = comments.next_cursor
+        self.assertEqual(walked, self.ordered_ids)
+
+    def test_json_format(self):
+        """С format=json порция приходит в JSON вместе с курсором."""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'format': 'json'},
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            self.ordered_ids[:4],
+        )
+        self.assertEqual(data['comments'][0]['author'], 'Author')
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_unknown_post(self):
+        """Комментарии несуществующего поста - 404."""
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
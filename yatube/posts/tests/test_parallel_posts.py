@@ -0,0 +1,151 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from .. import parallel
+from ..models import Comment, Follow, Post
+from ..utils import paginate
+
+User = get_user_model()
+
+
+class GatherTests(TestCase):
+    def test_sequential_inside_transaction(self):
+        """В транзакции теста все вызовы идут в потоке запроса."""
+        self.assertFalse(parallel.available())
+        threads = parallel.gather(threading.get_ident, threading.get_ident)
+        self.assertEqual(threads, [threading.get_ident()] * 2)
+
+    @override_settings(PAGE_QUERY_WORKERS=0)
+    def test_disabled_by_setting(self):
+        """PAGE_QUERY_WORKERS = 0 выключает пул."""
+        with mock.patch.object(
+            parallel.connection, 'in_atomic_block', False
+        ):
+            self.assertFalse(parallel.available())
+
+    def test_calls_run_in_pool(self):
+        """Вызовы кроме первого идут в пуле, результаты по порядку."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def call(value):
+            barrier.wait()
+            return value, threading.get_ident()
+
+        with mock.patch.object(parallel, 'available', return_value=True):
+            results = parallel.gather(
+                lambda: call(1), lambda: call(2), lambda: call(3)
+            )
+        parallel.shutdown()
+        self.assertEqual([value for value, _ in results], [1, 2, 3])
+        self.assertEqual(results[0][1], threading.get_ident())
+        self.assertEqual(len({thread for _, thread in results}), 3)
+
+    def test_error_raised_after_all_calls(self):
+        """Ошибка вызова пробрасывается, когда завершились все."""
+        finished = []
+
+        def fail():
+            raise ValueError
+
+        def slow():
+            finished.append(True)
+            return 1
+
+        with mock.patch.object(parallel, 'available', return_value=True):
+            with self.assertRaises(ValueError):
+                parallel.gather(fail, slow)
+        parallel.shutdown()
+        self.assertEqual(finished, [True])
+
+
+@override_settings(POSTS_PER_PAGE=5)
+class ParallelPaginateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост №{i}', author=cls.author)
+            for i in range(12)
+        ])
+
+    def test_same_page_as_paginate(self):
+        """Страница совпадает с utils.paginate при любом ?page."""
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        for page in ('1', '3', '99', 'abc', '-1', None):
+            with self.subTest(page=page):
+                data = {} if page is None else {'page': page}
+                request = RequestFactory().get('/', data)
+                expected = paginate(request, posts)
+                page_obj, extra = parallel.paginate(
+                    request, posts, lambda: 'extra'
+                )
+                self.assertEqual(extra, 'extra')
+                self.assertEqual(page_obj.number, expected.number)
+                self.assertEqual(list(page_obj), list(expected))
+                self.assertEqual(page_obj.paginator.num_pages, 3)
+
+    def test_count_and_rows_once(self):
+        """Число постов и строки страницы читаются по одному разу."""
+        request = RequestFactory().get('/', {'page': '2'})
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        with self.assertNumQueries(2):
+            page_obj, = parallel.paginate(request, posts)
+            self.assertEqual(len(page_obj.object_list), 5)
+            self.assertTrue(page_obj.has_next())
+
+
+class ParallelViewsTests(TransactionTestCase):
+    # Потоки пула видят только закоммиченные данные
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def get_pages(self):
+        cache.clear()
+        profile = self.client.get(reverse('posts:profile', args=['Author']))
+        detail = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(detail.status_code, 200)
+        return (
+            list(profile.context['page_obj']),
+            profile.context['following'],
+            detail.context['post'],
+            list(detail.context['comments']),
+        )
+
+    def test_pages_same_with_pool(self):
+        """Профиль и пост с пулом такие же, как без него."""
+        sequential = self.get_pages()
+        with mock.patch.object(parallel, 'available', return_value=True):
+            pooled = self.get_pages()
+        parallel.shutdown()
+        self.assertEqual(pooled, sequential)
+        self.assertEqual(pooled[0], [self.post])
+        self.assertTrue(pooled[1])
+
+    def test_missing_post_with_pool(self):
+        """Несуществующий пост с пулом - 404."""
+        with mock.patch.object(parallel, 'available', return_value=True):
+            response = self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk + 100])
+            )
+        parallel.shutdown()
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import counters, groups
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryBudgetTests(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        # Каждый пост от своего автора, чтобы N+1 по автору был заметен
+        authors = [
+            User.objects.create_user(username=f'Author{i}')
+            for i in range(settings.POSTS_PER_PAGE + 2)
+        ]
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост №{i}', author=author, group=cls.group)
+            for i, author in enumerate(authors)
+        ])
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        # bulk_create не шлёт сигналы: счётчики догоняем пересчётом
+        counters.recount_all()
+        cls.author = authors[0]
+        cls.post = Post.objects.filter(author=cls.author).first()
+        # Комментарии от разных авторов: N+1 по автору комментария
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=author, text='Комментарий')
+            for author in authors
+        ])
+
+    def setUp(self):
+        cache.clear()
+        # Справочник групп читается целиком один раз на версию
+        groups.registry()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def assertQueryBudget(self, client, url, budget):
+        with self.assertNumQueries(budget):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_query_budget(self):
+        """Ленты укладываются в фиксированный бюджет запросов."""
+        budgets = (
+            # COUNT(*) пагинатора + страница
+            (self.guest_client, reverse('posts:index'), 2),
+            # даты изменения + COUNT(*) + страница
+            (self.guest_client, reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}), 3),
+            # даты изменения + автор со счётчиками + COUNT(*) + страница
+            (self.guest_client, reverse(
+                'posts:profile',
+                kwargs={'username': self.author.username}), 4),
+            # сессия + пользователь + знаменитости (холодный кэш)
+            # + COUNT(*) + страница + отметка о просмотре
+            (self.authorized_client, reverse('posts:follow_index'), 6),
+        )
+        for client, url, budget in budgets:
+            with self.subTest(url=url):
+                self.assertQueryBudget(client, url, budget)
+
+    def test_post_detail_query_budget(self):
+        """Пост читается вместе с автором, группой и счётчиками."""
+        # даты изменения + пост + страница комментариев с авторами
+        self.assertQueryBudget(
+            self.guest_client,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            3,
+        )
+        self.assertQueryBudget(
+            self.guest_client,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            2,
+        )
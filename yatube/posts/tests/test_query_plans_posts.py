@@ -0,0 +1,97 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups, trending
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+# Полный проход по таблице: SCAN без индекса. Проход по уже
+# отобранному подзапросу (COUNT для Paginator) таблицу не читает
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?!subquery)\w+$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN у SQLite')
+@override_settings(POSTS_PER_PAGE=2, COMMENTS_PER_PAGE=2)
+class FeedQueryPlanTests(TestCase):
+    """Запросы лент читают индексы и не сортируют во временных B-tree."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text=f'Тестовый пост №{i}', author=cls.author, group=cls.group
+            )
+            for _ in range(3):
+                Comment.objects.create(
+                    post=cls.post, author=cls.reader, text='Комментарий'
+                )
+        trending.refresh()
+
+    def setUp(self):
+        cache.clear()
+        # Справочник групп читается целиком один раз на версию
+        groups.registry()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            for step in self.query_plan(query['sql']):
+                self.assertNotIn('TEMP B-TREE', step, query['sql'])
+                self.assertIsNone(FULL_SCAN.match(step), query['sql'])
+        return response
+
+    def test_feed_views_use_indexes(self):
+        """Ленты и их страницы по курсору идут по индексам."""
+        urls = (
+            (self.guest_client, reverse('posts:index')),
+            (self.guest_client, reverse('posts:hot')),
+            (self.guest_client, reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug})),
+            (self.guest_client, reverse(
+                'posts:profile', kwargs={'username': 'Author'})),
+            (self.guest_client, reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk})),
+            (self.guest_client, reverse(
+                'posts:post_comments', kwargs={'post_id': self.post.pk})),
+            (self.authorized_client, reverse('posts:follow_index')),
+        )
+        for client, url in urls:
+            for params in ('', '?page=2', '?cursor='):
+                with self.subTest(url=url + params):
+                    response = self.assertIndexedPlans(client, url + params)
+                    page_obj = (
+                        response.context.get('page_obj')
+                        or response.context.get('comments')
+                    )
+                    next_cursor = getattr(page_obj, 'next_cursor', None)
+                    if next_cursor:
+                        self.assertIndexedPlans(
+                            client, f'{url}?cursor={next_cursor}')
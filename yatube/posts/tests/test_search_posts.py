@@ -0,0 +1,106 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection, migrations
+from django.db.migrations.loader import MigrationLoader
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import fts, search
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(search.is_available(), 'Полнотекстовый индекс FTS5 у SQLite')
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Садоводы',
+            slug='garden',
+            description='Всё о грядках',
+        )
+        cls.post_garden = Post.objects.create(
+            text='Собрали урожай томатов <b>рано</b>',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.post_other = Post.objects.create(
+            text='Томаты томаты томаты: рецепт соуса',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        return [post.pk for post in search.search(query)[0:10]]
+
+    def test_search_ranked_with_snippet(self):
+        """Поиск ранжирует посты и подсвечивает совпадения."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'томат'}
+        )
+        results = list(response.context['page_obj'])
+        self.assertEqual(
+            [post.pk for post in results],
+            [self.post_other.pk, self.post_garden.pk],
+        )
+        self.assertContains(response, '<mark>Томаты</mark>')
+        # Текст поста в подсветке экранируется
+        self.assertContains(response, '&lt;b&gt;рано&lt;/b&gt;')
+
+    def test_index_follows_changes(self):
+        """Индекс следует за правкой групп и удалением постов."""
+        self.assertEqual(self.found('грядках'), [self.post_garden.pk])
+        Group.objects.filter(pk=self.group.pk).update(title='Огородники')
+        self.assertEqual(self.found('огородники'), [self.post_garden.pk])
+        Post.objects.filter(pk=self.post_other.pk).delete()
+        self.assertEqual(self.found('соуса'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        """Операторы FTS5 из запроса не ломают поиск."""
+        for query in ('AND', '"томаты', 'NEAR(', '*'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(
+                    reverse('posts:search'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_post_fts')
+        self.assertEqual(self.found('урожай'), [])
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.found('урожай'), [self.post_garden.pk])
+
+
+class SearchMigrationTests(TestCase):
+    def test_table_changes_drop_triggers(self):
+        """Миграции, меняющие posts_post и posts_group, снимают триггеры."""
+        field_operations = (
+            migrations.AddField,
+            migrations.AlterField,
+            migrations.RemoveField,
+            migrations.RenameField,
+        )
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        for (app, name), migration in loader.disk_migrations.items():
+            if app != 'posts' or name <= '0011':
+                continue
+            operations = migration.operations
+            changes = [
+                operation for operation in operations
+                if isinstance(operation, field_operations)
+                and operation.model_name in ('post', 'group')
+            ]
+            if not changes:
+                continue
+            with self.subTest(migration=name):
+                self.assertIs(operations[0].code, fts.drop_triggers)
+                self.assertIs(operations[-1].code, fts.create_triggers)
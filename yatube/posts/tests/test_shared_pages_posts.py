@@ -0,0 +1,138 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(SHARED_PAGES=True)
+class SharedPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': 'Author'}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def fragments(self, client, *items):
+        return client.get(
+            reverse('personal_fragments'),
+            {'fragments': json.dumps(list(items))},
+        )
+
+    def test_page_same_for_every_viewer(self):
+        """Страница одинакова для всех и разрешена общему кэшу."""
+        reader_page = self.reader_client.get(self.profile_url)
+        author_page = self.author_client.get(self.profile_url)
+        guest_page = self.client.get(self.profile_url)
+        self.assertEqual(reader_page.content, author_page.content)
+        self.assertEqual(reader_page.content, guest_page.content)
+        self.assertNotContains(reader_page, 'Reader')
+        self.assertContains(reader_page, 'data-personal="follow_button"')
+        self.assertIn('public', reader_page['Cache-Control'])
+        self.assertNotIn('Cookie', reader_page.get('Vary', ''))
+
+    def test_personal_fragments(self):
+        """Личные части отдаются отдельно, по пользователю."""
+        response = self.fragments(
+            self.reader_client,
+            {'name': 'user_menu'},
+            {'name': 'follow_button', 'args': {'author': self.author.pk}},
+            {'name': 'post_actions', 'args': {'post': self.post.pk}},
+        )
+        self.assertIn('no-cache', response['Cache-Control'])
+        user_menu, follow_button, post_actions = response.json()['fragments']
+        self.assertIn('Пользователь: Reader', user_menu)
+        self.assertIn('Отписаться', follow_button)
+        self.assertIn('Добавить комментарий', post_actions)
+        self.assertNotIn('Редактировать пост', post_actions)
+        response = self.fragments(
+            self.author_client,
+            {'name': 'post_actions', 'args': {'post': self.post.pk}},
+        )
+        self.assertIn('Редактировать пост', response.json()['fragments'][0])
+
+    def test_bad_fragment_request(self):
+        """Неизвестный фрагмент или аргумент - ошибка 400."""
+        for items in (
+            [{'name': 'missing'}],
+            [{'name': 'follow_button', 'args': {'user': self.author.pk}}],
+        ):
+            with self.subTest(items=items):
+                response = self.fragments(self.reader_client, *items)
+                self.assertEqual(response.status_code, 400)
+        for fragments in (
+            'not json',
+            '[{"name": "user_menu", "args": [1]}]',
+            '["user_menu"]',
+            '{"name": "user_menu"}',
+        ):
+            with self.subTest(fragments=fragments):
+                response = self.reader_client.get(
+                    reverse('personal_fragments'), {'fragments': fragments}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_fragments_highlight_page_menu_item(self):
+        """Отдельно запрошенный фрагмент выделяет пункт меню
+        страницы, которую передал загрузчик.
+        """
+        page = self.reader_client.get(reverse('posts:hot'))
+        self.assertContains(page, '?view=posts%3Ahot&')
+        response = self.reader_client.get(reverse('personal_fragments'), {
+            'view': 'posts:hot',
+            'fragments': json.dumps([{'name': 'user_menu'}]),
+        })
+        user_menu = response.json()['fragments'][0]
+        self.assertRegex(user_menu, r'active"\s+href="{}"'.format(
+            reverse('posts:hot')
+        ))
+
+    def test_login_marker_cookie(self):
+        """Вход ставит cookie-метку, выход её снимает."""
+        User.objects.create_user(username='Login', password='password')
+        client = Client()
+        response = client.post(
+            reverse('users:login'),
+            {'username': 'Login', 'password': 'password'},
+        )
+        self.assertEqual(
+            response.cookies[settings.LOGIN_MARKER_COOKIE].value, '1'
+        )
+        response = client.get(reverse('users:logout'))
+        self.assertEqual(
+            response.cookies[settings.LOGIN_MARKER_COOKIE]['max-age'], 0
+        )
+
+
+class PrivatePageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Reader')
+
+    def test_personal_parts_rendered_inline(self):
+        """Без SHARED_PAGES личные части отрисовываются на месте."""
+        cache.clear()
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: Reader')
+        self.assertNotContains(response, 'data-personal')
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.another = User.objects.create_user(username='Another')
+        cls.post = Post.objects.create(text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def timeline_ids(self, user):
+        return set(TimelineEntry.objects.filter(
+            user=user).values_list('post_id', flat=True))
+
+    def test_follow_fills_and_unfollow_trims(self):
+        """Подписка дополняет ленту, отписка очищает её."""
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Author'}))
+        self.assertEqual(self.timeline_ids(self.reader), {self.post.pk})
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'Author'}))
+        self.assertEqual(self.timeline_ids(self.reader), set())
+
+    def test_publish_fans_out(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertIn(new_post.pk, self.timeline_ids(self.reader))
+        self.assertNotIn(new_post.pk, self.timeline_ids(self.another))
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_TRIM_SLACK=1)
+    def test_publish_trims_timelines(self):
+        """Лента, переросшая предел с запасом, обрезается
+        до самых новых постов.
+        """
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(2)
+        ]
+        self.assertEqual(
+            self.timeline_ids(self.reader),
+            {self.post.pk} | {post.pk for post in posts},
+        )
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(
+            self.timeline_ids(self.reader), {posts[1].pk, new_post.pk}
+        )
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWERS=2)
+    def test_celebrity_posts_are_pulled(self):
+        """Посты знаменитостей не раскладываются,
+        но видны в ленте подписок.
+        """
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.another, author=self.author)
+        self.assertIn(self.author.pk, timeline.celebrity_ids())
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertNotIn(new_post.pk, self.timeline_ids(self.reader))
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+
+    def test_backfill_command(self):
+        """Команда backfill_timeline пересобирает ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('backfill_timeline', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.timeline_ids(self.reader), {self.post.pk})
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import transfer
+from ..models import Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = os.path.join(TEMP_DIR, 'media')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Тестовое название группы',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        cls.post.image.save('photo.gif', ContentFile(b'GIF89a'))
+        Post.objects.create(text='Пост без группы', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.path = os.path.join(TEMP_DIR, 'posts.export')
+
+    def round_trip(self, format, **options):
+        call_command(
+            'export_posts', output=self.path, format=format,
+            stderr=StringIO(), **options
+        )
+        exported = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author', 'group', 'image'
+        ))
+        Post.objects.all().delete()
+        call_command(
+            'import_posts', self.path, format=format, batch_size=1,
+            stdout=StringIO(), **options
+        )
+        imported = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author', 'group', 'image'
+        ))
+        self.assertEqual(imported, exported)
+
+    def test_ndjson_round_trip(self):
+        """Выгрузка в NDJSON загружается обратно без потерь."""
+        self.round_trip('ndjson')
+        with open(self.path, encoding='utf-8') as file:
+            first = json.loads(file.readline())
+        self.assertEqual(first['author'], 'Author')
+        self.assertEqual(first['group'], 'test-slug')
+
+    def test_csv_round_trip(self):
+        """Выгрузка в CSV загружается обратно без потерь."""
+        self.round_trip('csv')
+
+    def test_images_are_copied(self):
+        """С --media-dir картинки переносятся вместе с постами."""
+        media_dir = os.path.join(TEMP_DIR, 'export-media')
+        name = self.post.image.name
+        self.round_trip('ndjson', media_dir=media_dir)
+        self.assertTrue(os.path.isfile(os.path.join(media_dir, name)))
+        os.remove(os.path.join(TEMP_MEDIA_ROOT, name))
+        Post.objects.all().delete()
+        call_command(
+            'import_posts', self.path, media_dir=media_dir,
+            stdout=StringIO(),
+        )
+        self.assertTrue(os.path.isfile(os.path.join(TEMP_MEDIA_ROOT, name)))
+
+    def test_import_maintains_derived_data(self):
+        """После загрузки обновлены счётчики и ленты подписчиков."""
+        self.round_trip('ndjson')
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 2
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+
+    def test_lookups_are_batched(self):
+        """Авторы и группы ищутся одним запросом на порцию."""
+        rows = [
+            {'text': f'Пост {i}', 'author': 'Author', 'group': 'test-slug'}
+            for i in range(20)
+        ]
+        importer = transfer.Importer(batch_size=10)
+        # по порции: авторы, группы, INSERT (+ SAVEPOINT/RELEASE)
+        with self.assertNumQueries(2 + 3 + 3):
+            for start in (0, 10):
+                importer._import_batch(rows[start:start + 10])
+        self.assertEqual(importer.imported, 20)
+
+    def test_bad_rows_are_skipped(self):
+        """Строки с неизвестным автором, группой или датой пропускаются."""
+        importer = transfer.Importer()
+        importer.run([
+            {'text': 'Пост', 'author': 'Nobody'},
+            {'text': 'Пост', 'author': 'Author', 'group': 'missing'},
+            {'text': 'Пост', 'author': 'Author', 'pub_date': 'вчера'},
+            {'text': '', 'author': 'Author'},
+            {'text': 'Пост', 'author': 'Author', 'image': '../secret.txt'},
+            {
+                'text': 'Старый пост',
+                'author': 'Author',
+                'pub_date': (
+                    timezone.now() - timedelta(days=30)
+                ).isoformat(),
+            },
+        ])
+        self.assertEqual((importer.imported, importer.skipped), (2, 4))
+        self.assertEqual(
+            Post.objects.get(text='Пост', author=self.author, group=None)
+            .image.name, '',
+        )
+        self.assertLess(
+            Post.objects.get(text='Старый пост').pub_date,
+            timezone.now() - timedelta(days=29),
+        )
+
+    def test_malformed_values_are_skipped(self):
+        """Несуществующая дата и значения не того типа
+        пропускают строку, а не обрывают загрузку.
+        """
+        importer = transfer.Importer()
+        importer.run([
+            {'text': 'Пост', 'author': 'Author',
+             'pub_date': '2020-13-01T00:00:00'},
+            {'text': 'Пост', 'author': ['Author']},
+            {'text': 'Пост', 'author': 'Author', 'group': {'slug': 1}},
+            {'text': ['Пост'], 'author': 'Author'},
+            {'text': 'Пост', 'author': 'Author', 'image': 1},
+            {'text': 'Целый пост', 'author': 'Author'},
+        ])
+        self.assertEqual((importer.imported, importer.skipped), (1, 5))
+
+    def test_broken_lines_are_skipped(self):
+        """Битые строки NDJSON пропускаются, остальные загружаются."""
+        file = StringIO(
+            '{"text": "Пост", "author": "Author"}\n'
+            '{"text": "Обрыв\n'
+            '[1, 2]\n'
+        )
+        importer = transfer.Importer()
+        importer.run(transfer.read_rows(file))
+        self.assertEqual((importer.imported, importer.skipped), (1, 2))
+
+    def test_finish_runs_after_error(self):
+        """Если загрузка оборвалась, уже созданные посты учтены."""
+        def rows():
+            yield {'text': 'Пост', 'author': 'Author'}
+            raise OSError
+
+        importer = transfer.Importer(batch_size=1)
+        with self.assertRaises(OSError):
+            importer.run(rows())
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count,
+            Post.objects.filter(author=self.author).count(),
+        )
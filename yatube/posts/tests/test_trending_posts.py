@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Post, PostScore
+
+User = get_user_model()
+
+
+@override_settings(HOT_DECAY_SECONDS=60 * 60, HOT_FOLLOWER_WEIGHT=1.0)
+class HotDateTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_quiet_post_keeps_pub_date(self):
+        """Пост без комментариев и подписчиков стоит на дате публикации."""
+        self.assertEqual(trending.hot_date(self.now, 0, []), self.now)
+
+    def test_activity_moves_post_forward(self):
+        """Свежие комментарии и подписчики поднимают пост."""
+        quiet = trending.hot_date(self.now, 0, [])
+        popular_author = trending.hot_date(self.now, 1000, [])
+        discussed = trending.hot_date(self.now, 0, [self.now] * 10)
+        self.assertGreater(popular_author, quiet)
+        self.assertGreater(discussed, popular_author)
+
+    def test_old_comments_decay(self):
+        """Старые комментарии весят меньше свежих."""
+        pub_date = self.now - timedelta(days=1)
+        fresh = trending.hot_date(pub_date, 0, [self.now] * 3)
+        old = trending.hot_date(
+            pub_date, 0, [pub_date + timedelta(minutes=5)] * 3
+        )
+        self.assertGreater(fresh, old)
+
+    def test_comments_added_incrementally(self):
+        """Добавление комментариев к горячей дате совпадает
+        с пересчётом целиком.
+        """
+        pub_date = self.now - timedelta(hours=5)
+        old = [pub_date + timedelta(minutes=10)] * 2
+        new = [self.now - timedelta(minutes=1), self.now]
+        full = trending.hot_date(pub_date, 10, old + new)
+        incremental = trending.add_comments(
+            trending.hot_date(pub_date, 10, old), new
+        )
+        self.assertAlmostEqual(
+            (incremental - full).total_seconds(), 0, places=3
+        )
+
+
+class RefreshTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.old_post = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.author
+        )
+        cls.new_post = Post.objects.create(
+            text='Тихий пост', author=cls.reader
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_only_changed_posts_refreshed(self):
+        """Пересчитываются только посты с новыми данными."""
+        self.assertEqual(trending.refresh(), 2)
+        self.assertEqual(PostScore.objects.count(), 2)
+        self.assertEqual(trending.refresh(), 0)
+        Comment.objects.create(
+            post=self.old_post, author=self.reader, text='Комментарий'
+        )
+        self.assertEqual(trending.refresh(), 1)
+
+    def test_refresh_reads_only_new_comments(self):
+        """Повторный расчёт читает только комментарии после прошлого."""
+        Comment.objects.create(
+            post=self.old_post, author=self.reader, text='Старый'
+        )
+        trending.refresh()
+        Comment.objects.create(
+            post=self.old_post, author=self.reader, text='Новый'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            trending.refresh()
+        comment_queries = [
+            query['sql'] for query in queries
+            if 'FROM "posts_comment"' in query['sql']
+        ]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertIn('"posts_postscore"."computed"', comment_queries[0])
+        score = PostScore.objects.get(post=self.old_post)
+        dates = Comment.objects.filter(
+            post=self.old_post
+        ).values_list('created', flat=True)
+        expected = trending.hot_date(self.old_post.pub_date, 0, list(dates))
+        self.assertAlmostEqual(
+            (score.hot_date - expected).total_seconds(), 0, places=3
+        )
+
+    def test_author_changes_keep_old_posts(self):
+        """Новый пост, подписка и правка профиля автора
+        не пересчитывают его старые посты.
+        """
+        trending.refresh()
+        Post.objects.create(text='Ещё пост', author=self.author)
+        self.assertEqual(trending.refresh(), 1)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author.first_name = 'Автор'
+        self.author.save()
+        self.assertEqual(trending.refresh(), 0)
+        score = PostScore.objects.get(post=self.old_post)
+        self.assertEqual(score.followers_count, 0)
+
+    def test_hot_page_order(self):
+        """Обсуждаемый пост обгоняет более новый пост без комментариев."""
+        for _ in range(5):
+            Comment.objects.create(
+                post=self.old_post, author=self.reader, text='Комментарий'
+            )
+        trending.refresh()
+        response = Client().get(reverse('posts:hot'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.old_post, self.new_post],
+        )
+
+    def test_deleted_post_leaves_ranking(self):
+        """Удалённый пост пропадает из ленты популярного."""
+        post = Post.objects.create(text='Удалится', author=self.author)
+        trending.refresh()
+        post.delete()
+        self.assertFalse(PostScore.objects.filter(post_id=post.pk).exists())
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.stranger = User.objects.create_user(username='Stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def unread(self, client):
+        return client.get(reverse('posts:follow_unread')).json()['unread']
+
+    def test_new_posts_counted_for_followers(self):
+        """Пост через post_create - новый для подписчиков автора."""
+        for text in ('Первый', 'Второй'):
+            self.author_client.post(
+                reverse('posts:post_create'), data={'text': text}
+            )
+        self.assertEqual(self.unread(self.reader_client), 2)
+        self.assertEqual(self.unread(self.stranger_client), 0)
+
+    def test_feed_view_marks_posts_seen(self):
+        """Просмотр ленты подписок обнуляет счётчик."""
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.reader_client.get(reverse('posts:follow_index'))
+        response = self.reader_client.get(reverse('posts:follow_unread'))
+        self.assertEqual(response.json()['unread'], 0)
+        self.assertIsNotNone(response.json()['seen'])
+
+    def test_deleted_unseen_post_uncounted(self):
+        """Удалённый непрочитанный пост пропадает из счётчика."""
+        seen = Post.objects.create(text='Прочитанный пост', author=self.author)
+        self.reader_client.get(reverse('posts:follow_index'))
+        unseen = Post.objects.create(text='Новый пост', author=self.author)
+        seen.delete()
+        self.assertEqual(self.unread(self.reader_client), 1)
+        unseen.delete()
+        self.assertEqual(self.unread(self.reader_client), 0)
+
+    def test_deleted_post_uncounted_only_for_earlier_followers(self):
+        """Удаление поста не уменьшает счётчик подписчику,
+        который подписался после публикации.
+        """
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        Follow.objects.create(user=self.stranger, author=self.author)
+        Post.objects.create(text='Ещё пост', author=self.author)
+        post.delete()
+        self.assertEqual(self.unread(self.stranger_client), 1)
+        self.assertEqual(self.unread(self.reader_client), 1)
+
+    def test_feed_view_writes_only_when_needed(self):
+        """Лента без новых постов и дальние страницы
+        не переписывают счётчик.
+        """
+        self.reader_client.get(reverse('posts:follow_index'))
+        seen = UserStats.objects.get(pk=self.reader.pk).feed_seen
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            UserStats.objects.get(pk=self.reader.pk).feed_seen, seen
+        )
+        for text in ('Первый', 'Второй'):
+            Post.objects.create(text=text, author=self.author)
+        with self.settings(POSTS_PER_PAGE=1):
+            self.reader_client.get(
+                reverse('posts:follow_index'), {'page': 2}
+            )
+        self.assertEqual(self.unread(self.reader_client), 2)
+
+    def test_polling_skips_posts_table(self):
+        """Опрос счётчика не читает таблицу постов."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(reverse('posts:follow_unread'))
+        self.assertEqual(response.status_code, 200)
+        for query in queries:
+            self.assertNotIn('posts_post', query['sql'])
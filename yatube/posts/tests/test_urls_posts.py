@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -36,6 +37,8 @@ class PostURLTests(TestCase):
         }
 
     def setUp(self):
+        # Страницы для гостей кэшируются целиком
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client(self.author)
         self.authorized_client.force_login(self.author)
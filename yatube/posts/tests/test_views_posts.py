@@ -129,7 +129,7 @@ class PostViewsTests(TestCase):
 
         self.check_context_post(post_object)
         # Фильтруем по групе
-        self.assertEqual(post_object.pk, self.group.pk)
+        self.assertEqual(post_object.group.pk, self.group.pk)
 
     def test_profile_page_show_correct_context(self):
         """Шаблон profile сформирован с правильным контекстом."""
@@ -293,7 +293,7 @@ class PostViewsTests(TestCase):
         cache.clear()
         response = self.authorized_client.get(reverse('posts:index'))
         response_cached = response.content
-        post = Post.objects.get(pk=1)
+        post = Post.objects.get(pk=self.post.pk)
         post.delete()
         response = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response_cached)
@@ -0,0 +1,197 @@
+"""Материализованная лента подписок (fan-out on write).
+
+При публикации пост раскладывается по лентам подписчиков автора,
+и follow_index читает готовую ленту по индексу (user, pub_date).
+Посты «знаменитостей» (авторов с большим числом подписчиков)
+не раскладываются: они подмешиваются в ленту при чтении.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from .models import Follow, Post, TimelineEntry
+
+CELEBRITIES_CACHE_KEY = 'timeline:celebrities'
+CELEBRITIES_CACHE_TIMEOUT = 60 * 5
+
+
+def followers_count(author_id):
+    return Follow.objects.filter(author_id=author_id).count()
+
+
+def celebrity_ids():
+    """Множество id авторов, чьи посты подмешиваются при чтении."""
+    celebrities = cache.get(CELEBRITIES_CACHE_KEY)
+    if celebrities is None:
+        celebrities = set(
+            Follow.objects.values('author_id').annotate(
+                followers=Count('id')
+            ).filter(
+                followers__gte=settings.TIMELINE_CELEBRITY_FOLLOWERS
+            ).values_list('author_id', flat=True)
+        )
+        cache.set(
+            CELEBRITIES_CACHE_KEY, celebrities, CELEBRITIES_CACHE_TIMEOUT
+        )
+    return celebrities
+
+
+def _store(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _trim_overflowing(user_ids):
+    """Обрезает ленты пользователей, переросшие предел с запасом.
+
+    Переполненные ленты ищутся одним запросом на пачку, а запас
+    TIMELINE_TRIM_SLACK не даёт обрезать полную ленту при каждой
+    публикации.
+    """
+    overflowing = TimelineEntry.objects.filter(
+        user_id__in=user_ids
+    ).order_by().values('user_id').annotate(entries=Count('id')).filter(
+        entries__gt=(
+            settings.TIMELINE_MAX_LENGTH + settings.TIMELINE_TRIM_SLACK
+        )
+    ).values_list('user_id', flat=True)
+    for user_id in list(overflowing):
+        trim(user_id)
+
+
+def _fan_out(posts, user_ids):
+    """Раскладывает посты по лентам пользователей."""
+    batch = []
+    batch_users = []
+    for user_id in user_ids:
+        batch.extend(
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        )
+        batch_users.append(user_id)
+        if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+            _store(batch)
+            _trim_overflowing(batch_users)
+            batch = []
+            batch_users = []
+    if batch:
+        _store(batch)
+        _trim_overflowing(batch_users)
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date'
+        ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_POSTS]
+    )
+
+
+def publish(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True).iterator()
+    _fan_out([(post.pk, post.pub_date)], followers)
+
+
+def trim(user_id):
+    """Оставляет в ленте не больше TIMELINE_MAX_LENGTH записей."""
+    oldest_kept = TimelineEntry.objects.filter(
+        user_id=user_id
+    ).order_by('-pub_date').values_list(
+        'pub_date', flat=True
+    )[settings.TIMELINE_MAX_LENGTH:settings.TIMELINE_MAX_LENGTH + 1]
+    oldest_kept = list(oldest_kept)
+    if oldest_kept:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lte=oldest_kept[0]
+        ).delete()
+
+
+def follow(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    _update_celebrity(author_id)
+    if author_id in celebrity_ids():
+        return
+    _fan_out(_recent_posts(author_id), [user_id])
+
+
+def unfollow(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    _update_celebrity(author_id)
+
+
+def _update_celebrity(author_id):
+    """Следит за переходом автора через порог знаменитости.
+
+    Автору, который перестал быть знаменитостью, ленты подписчиков
+    дозаполняются его свежими постами: пока он был знаменитостью,
+    они туда не раскладывались.
+    """
+    celebrities = celebrity_ids()
+    is_celebrity = (
+        followers_count(author_id) >= settings.TIMELINE_CELEBRITY_FOLLOWERS
+    )
+    if is_celebrity == (author_id in celebrities):
+        return
+    if is_celebrity:
+        celebrities.add(author_id)
+    else:
+        celebrities.discard(author_id)
+    cache.set(CELEBRITIES_CACHE_KEY, celebrities, CELEBRITIES_CACHE_TIMEOUT)
+    if not is_celebrity:
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True).iterator()
+        _fan_out(_recent_posts(author_id), followers)
+
+
+def rebuild(user_id):
+    """Пересобирает ленту пользователя из его подписок."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    posts = Post.objects.filter(
+        author__following__user_id=user_id
+    ).exclude(
+        author_id__in=celebrity_ids()
+    ).order_by('-pub_date').values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_MAX_LENGTH]
+    _fan_out(list(posts), [user_id])
+
+
+def timeline_posts(user):
+    """Посты ленты подписок пользователя.
+
+    Лента упорядочена по ключу (feed_date, feed_key). Без знаменитостей
+    это колонки самой ленты, и страница читается диапазоном индекса
+    (user, pub_date, post) без сортировки.
+    """
+    posts = Post.objects.feed()
+    celebrities = celebrity_ids()
+    followed_celebrities = []
+    if celebrities:
+        followed_celebrities = list(
+            Follow.objects.filter(
+                user=user, author_id__in=celebrities
+            ).values_list('author_id', flat=True)
+        )
+    if not followed_celebrities:
+        posts = posts.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_key=F('timeline_entries__post_id'),
+        )
+    else:
+        posts = posts.filter(
+            Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+            | Q(author_id__in=followed_celebrities)
+        ).annotate(feed_date=F('pub_date'), feed_key=F('pk'))
+    return posts.order_by('-feed_date', '-feed_key')
@@ -0,0 +1,233 @@
+"""Потоковые импорт и экспорт постов в NDJSON и CSV.
+
+Посты читаются и пишутся порциями, поэтому память не зависит
+от размера выгрузки. Автор и группа передаются естественными
+ключами: username и slug.
+"""
+import csv
+import json
+import os
+import shutil
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import conditional, counters, page_cache, timeline
+from .models import Follow, Group, Post, User
+from .utils import explicit_dates
+
+FIELDS = ('text', 'pub_date', 'author', 'group', 'image')
+FORMATS = ('ndjson', 'csv')
+# Картинки постов лежат в MEDIA_ROOT/posts/ (upload_to поля image)
+IMAGES_DIR = 'posts'
+
+
+def export_rows(batch_size=1000):
+    """Посты в порядке id, словарями с полями FIELDS."""
+    rows = Post.objects.order_by('pk').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    ).iterator(chunk_size=batch_size)
+    for text, pub_date, author, group, image in rows:
+        yield {
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+            'image': image or '',
+        }
+
+
+def write_rows(rows, file, format='ndjson'):
+    if format == 'csv':
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+def read_rows(file, format='ndjson'):
+    if format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if not line.strip():
+            continue
+        # Битая строка отдаётся пустой и считается пропущенной,
+        # а не обрывает загрузку на середине
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {}
+
+
+def image_name(name):
+    """Имя картинки из выгрузки или None, если оно вне IMAGES_DIR."""
+    name = os.path.normpath(name or '').replace(os.sep, '/')
+    if not name.startswith(IMAGES_DIR + '/') or '..' in name.split('/'):
+        return None
+    return name
+
+
+def export_images(names, media_dir):
+    """Копирует картинки из хранилища в media_dir, сохраняя пути."""
+    copied = 0
+    for name in names:
+        name = image_name(name)
+        if name is None or not default_storage.exists(name):
+            continue
+        target = os.path.join(media_dir, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with default_storage.open(name) as source, \
+                open(target, 'wb') as destination:
+            shutil.copyfileobj(source, destination)
+        copied += 1
+    return copied
+
+
+def _import_image(name, media_dir):
+    name = image_name(name)
+    if name is None:
+        return ''
+    source = os.path.join(media_dir, name)
+    if not default_storage.exists(name) and os.path.isfile(source):
+        with open(source, 'rb') as file:
+            name = default_storage.save(name, File(file))
+    return name
+
+
+class Lookup:
+    """Кэш id по естественному ключу.
+
+    Ключи, которых ещё нет в кэше, догружаются одним запросом
+    на порцию строк; ненайденные тоже запоминаются.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, keys):
+        # Ключ из выгрузки - строка; прочее (списки из NDJSON)
+        # не ищется, и строка с ним будет пропущена
+        missing = {
+            key for key in keys if key and isinstance(key, str)
+        } - self.ids.keys()
+        if not missing:
+            return
+        found = dict(self.queryset.filter(
+            **{f'{self.field}__in': missing}
+        ).values_list(self.field, 'pk'))
+        for key in missing:
+            self.ids[key] = found.get(key)
+
+    def get(self, key):
+        if not isinstance(key, str):
+            return None
+        return self.ids.get(key)
+
+
+class Importer:
+    """Создаёт посты из строк выгрузки порциями bulk_create.
+
+    bulk_create не шлёт сигналы, поэтому finish() после загрузки
+    пересчитывает счётчики авторов, ленты их подписчиков,
+    даты изменения страниц и версии кэша страниц.
+    """
+
+    def __init__(self, batch_size=1000, media_dir=None):
+        self.batch_size = batch_size
+        self.media_dir = media_dir
+        self.authors = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.imported = 0
+        self.skipped = 0
+        self.author_ids = set()
+        self.group_ids = set()
+        self.scopes = set()
+
+    def run(self, rows):
+        # Уже загруженные порции остаются в базе и при ошибке,
+        # поэтому производные данные для них пересчитываются всегда
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._import_batch(batch)
+                    batch = []
+            if batch:
+                self._import_batch(batch)
+        finally:
+            self.finish()
+
+    def _post(self, row):
+        author_id = self.authors.get(row.get('author'))
+        group_id = self.groups.get(row.get('group'))
+        try:
+            pub_date = parse_datetime(row.get('pub_date') or '')
+        except (ValueError, TypeError):
+            # Дата по формату, но несуществующая (13-й месяц)
+            # или не строка
+            return None
+        image = row.get('image') or ''
+        if (
+            author_id is None
+            or not row.get('text')
+            or not isinstance(row['text'], str)
+            or not isinstance(image, str)
+            or (row.get('group') and group_id is None)
+            or (row.get('pub_date') and pub_date is None)
+        ):
+            return None
+        if image and self.media_dir:
+            image = _import_image(image, self.media_dir)
+        elif image:
+            image = image_name(image) or ''
+        self.scopes.add(('author', row['author']))
+        if group_id is not None:
+            self.group_ids.add(group_id)
+            self.scopes.add(('group', row['group']))
+        return Post(
+            text=row['text'],
+            pub_date=pub_date or timezone.now(),
+            author_id=author_id,
+            group_id=group_id,
+            image=image,
+        )
+
+    def _import_batch(self, rows):
+        self.authors.load(row.get('author') for row in rows)
+        self.groups.load(row.get('group') for row in rows)
+        posts = []
+        for row in rows:
+            post = self._post(row)
+            if post is None:
+                self.skipped += 1
+            else:
+                posts.append(post)
+                self.author_ids.add(post.author_id)
+        with transaction.atomic(), explicit_dates(
+            Post._meta.get_field('pub_date')
+        ):
+            Post.objects.bulk_create(posts)
+        self.imported += len(posts)
+
+    def finish(self):
+        if not self.imported:
+            return
+        counters.recount_users(self.author_ids)
+        followers = Follow.objects.filter(
+            author_id__in=self.author_ids
+        ).values_list('user_id', flat=True).distinct()
+        for user_id in followers.iterator():
+            timeline.rebuild(user_id)
+        conditional.touch_user(*self.author_ids)
+        conditional.touch_group_posts(pk__in=self.group_ids)
+        page_cache.bump(page_cache.FEED, *self.scopes)
@@ -0,0 +1,146 @@
+"""Лента популярного: посты с недавними комментариями и авторы
+с большим числом подписчиков.
+
+Место поста - «горячая дата» (PostScore.hot_date): дата публикации,
+сдвинутая вперёд весом поста. Вес складывается из подписчиков автора
+при первом расчёте (он идёт вскоре после публикации) и комментариев,
+и каждое слагаемое затухает в e раз за HOT_DECAY_SECONDS от своей
+даты. Поэтому горячая дата не меняется со временем сама по себе,
+а пост с потоком свежих комментариев обгоняет новые посты без
+обсуждения.
+
+Горячие даты считает refresh() (команда refresh_hot_posts по cron),
+и только для новых постов и постов, изменившихся с прошлого расчёта:
+комментарии сдвигают Post.updated. Такие посты читаются диапазоном
+индекса по updated, а не проходом по всей таблице, а к их горячей
+дате добавляются только комментарии после прошлого расчёта. Страница
+популярного читает диапазон индекса (hot_date, post) по курсору,
+как обычная лента.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from . import page_cache
+from .models import Comment, Post, PostScore
+
+OVERLAP = timedelta(minutes=1)
+
+
+def _log_sum_date(points):
+    """tau * log(sum(weight * exp(date / tau))) как дата.
+
+    Экспоненты считаются относительно самой поздней даты, чтобы
+    не переполнялись.
+    """
+    decay = settings.HOT_DECAY_SECONDS
+    latest = max(date for date, _ in points)
+    total = sum(
+        weight * math.exp((date - latest).total_seconds() / decay)
+        for date, weight in points
+    )
+    return latest + timedelta(seconds=decay * math.log(total))
+
+
+def hot_date(pub_date, followers_count, comment_dates):
+    """Горячая дата поста."""
+    points = [(pub_date, 1 + settings.HOT_FOLLOWER_WEIGHT * math.log1p(
+        followers_count
+    ))]
+    points.extend((date, 1) for date in comment_dates)
+    return _log_sum_date(points)
+
+
+def add_comments(hot, comment_dates):
+    """Горячая дата после новых комментариев.
+
+    Прежняя горячая дата и есть сумма весов прошлых слагаемых,
+    поэтому новые комментарии прибавляются к ней без перечитывания
+    старых.
+    """
+    if not comment_dates:
+        return hot
+    return _log_sum_date([(hot, 1)] + [(date, 1) for date in comment_dates])
+
+
+def stale_posts():
+    """Посты без горячей даты или изменившиеся после её расчёта.
+
+    Кандидаты берутся диапазоном индекса по updated от прошлого
+    расчёта с запасом OVERLAP: транзакция, закоммиченная после начала
+    прошлого прохода, могла записать updated раньше его даты.
+    """
+    posts = Post.objects.all()
+    last_computed = PostScore.objects.aggregate(
+        last=Max('computed')
+    )['last']
+    if last_computed is not None:
+        posts = posts.filter(updated__gt=last_computed - OVERLAP)
+    return posts.filter(
+        Q(score__isnull=True) | Q(updated__gt=F('score__computed'))
+    )
+
+
+def _refresh_batch(pks, computed):
+    """Новым постам считает горячую дату целиком, у посчитанных
+    добавляет только комментарии после прошлого расчёта.
+
+    Удалённый комментарий из посчитанной даты не вычитается:
+    его вес и так затухает.
+    """
+    scores = {
+        score.post_id: score
+        for score in PostScore.objects.filter(post_id__in=pks)
+    }
+    comment_dates = defaultdict(list)
+    new_comments = Comment.objects.filter(
+        post_id__in=scores, created__gt=F('post__score__computed')
+    )
+    all_comments = Comment.objects.filter(
+        post_id__in=[pk for pk in pks if pk not in scores]
+    )
+    for comments in (new_comments, all_comments):
+        for post_id, created in comments.values_list('post_id', 'created'):
+            comment_dates[post_id].append(created)
+    for score in scores.values():
+        score.hot_date = add_comments(
+            score.hot_date, comment_dates[score.post_id]
+        )
+        score.computed = computed
+    PostScore.objects.bulk_update(scores.values(), ['hot_date', 'computed'])
+    PostScore.objects.bulk_create([
+        PostScore(
+            post_id=pk,
+            hot_date=hot_date(pub_date, followers or 0, comment_dates[pk]),
+            followers_count=followers or 0,
+            computed=computed,
+        )
+        for pk, pub_date, followers in Post.objects.filter(
+            pk__in=[pk for pk in pks if pk not in scores]
+        ).values_list('pk', 'pub_date', 'author__stats__followers_count')
+    ], ignore_conflicts=True)
+
+
+def refresh(batch_size=1000):
+    """Пересчитывает устаревшие горячие даты; возвращает их число."""
+    # Дата расчёта берётся до чтения: изменения во время прохода
+    # окажутся позже неё и попадут в следующий
+    computed = timezone.now()
+    pks = list(stale_posts().values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        _refresh_batch(pks[start:start + batch_size], computed)
+    if pks:
+        page_cache.bump(page_cache.HOT)
+    return len(pks)
+
+
+def hot_posts():
+    """Посты ленты популярного, по ключу (hot_date, hot_key)."""
+    return Post.objects.feed().filter(score__isnull=False).annotate(
+        hot_date=F('score__hot_date'),
+        hot_key=F('score__post_id'),
+    ).order_by('-hot_date', '-hot_key')
@@ -0,0 +1,54 @@
+"""Счётчики непрочитанных постов ленты подписок.
+
+Счётчик лежит в UserStats подписчика: публикация поста увеличивает
+его всем подписчикам автора одним UPDATE, просмотр ленты обнуляет
+и запоминает время просмотра. Клиенты опрашивают state(): это чтение
+одной строки UserStats по первичному ключу, без таблицы постов.
+
+Счётчик меняется и для подписчиков знаменитостей, хотя их посты
+в ленты не раскладываются: UPDATE числа дешевле вставки записей ленты.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import UserStats
+
+
+def _followers(author_id):
+    return UserStats.objects.filter(user__follower__author_id=author_id)
+
+
+def publish(post):
+    """Новый пост автора не прочитан всеми его подписчиками."""
+    _followers(post.author_id).update(unread_count=F('unread_count') + 1)
+
+
+def unpublish(post):
+    """Удалённый пост не считается у тех, кто его ещё не видел.
+
+    Пост был посчитан только подписчикам, подписанным до его
+    публикации: подписка и её дата проверяются в одном JOIN.
+    """
+    UserStats.objects.filter(
+        Q(feed_seen__isnull=True) | Q(feed_seen__lt=post.pub_date),
+        user__follower__author_id=post.author_id,
+        user__follower__created__lt=post.pub_date,
+        unread_count__gt=0,
+    ).update(unread_count=F('unread_count') - 1)
+
+
+def mark_seen(user):
+    """Лента просмотрена: новых постов больше нет.
+
+    Строка переписывается, только если в ней есть что обнулять.
+    """
+    UserStats.objects.filter(
+        Q(unread_count__gt=0) | Q(feed_seen__isnull=True), pk=user.pk
+    ).update(unread_count=0, feed_seen=timezone.now())
+
+
+def state(user):
+    """Число непрочитанных постов и время прошлого просмотра ленты."""
+    return UserStats.objects.filter(pk=user.pk).values_list(
+        'unread_count', 'feed_seen'
+    ).first() or (0, None)
@@ -7,12 +7,22 @@ app_name = 'posts'
 urlpatterns = [
     # Главная страница
     path('', views.index, name='index'),
+    # Популярные посты
+    path('hot/', views.hot, name='hot'),
     # Страница сообществ
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
     # Просмотр отдельного поста
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    # Следующие комментарии поста
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    # Поиск по постам
+    path('search/', views.post_search, name='search'),
     # Создание нового поста
     path('create/', views.post_create, name='post_create'),
     # Редактирование созданного поста
@@ -25,6 +35,8 @@ urlpatterns = [
     ),
     # Информация о подписках
     path('follow/', views.follow_index, name='follow_index'),
+    # Число новых постов ленты подписок
+    path('follow/unread/', views.follow_unread, name='follow_unread'),
     # Подписаться на автора
     path(
         'profile/<str:username>/follow/',
@@ -0,0 +1,181 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, date, pk):
+    """Упаковывает позицию (дата, id) в непрозрачный токен."""
+    raw = f'{direction}|{date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает токен курсора.
+
+    Для пустого или испорченного токена возвращает None:
+    такой запрос получает первую страницу ленты.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, date, pk = raw.decode().split('|')
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or date is None:
+        return None
+    return direction, date, pk
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет bulk_create сохранить даты вместо auto_now_add."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class CursorPage(Sequence):
+    """Страница ленты, полученная по курсору.
+
+    Повторяет интерфейс Page, которым пользуются шаблоны,
+    но вместо номеров страниц отдаёт токены соседних страниц.
+    """
+
+    def __init__(self, object_list, paginator, cursor,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor or ''
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page {self.cursor or "first"}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу (дата, id) без OFFSET и COUNT(*).
+
+    Каждая страница читается одним запросом по диапазону ключа,
+    поэтому первая и десятитысячная страницы стоят одинаково.
+    """
+
+    def __init__(self, object_list, per_page,
+                 date_field='pub_date', key_field='pk'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.date_field = date_field
+        self.key_field = key_field
+
+    def _value(self, obj, field):
+        # Строки из .values() приходят словарями
+        if isinstance(obj, dict):
+            return obj[field]
+        return getattr(obj, field)
+
+    def cursor_for(self, direction, obj):
+        """Токен позиции сразу после (NEXT) или перед (PREVIOUS) obj."""
+        return encode_cursor(
+            direction,
+            self._value(obj, self.date_field),
+            self._value(obj, self.key_field),
+        )
+
+    def _window(self, direction, date, pk):
+        # (date, key) < (d, k) записано как диапазон по дате минус
+        # хвост с той же датой: так SQLite читает диапазон одного
+        # индекса и не сортирует результат
+        field, key = self.date_field, self.key_field
+        if direction == NEXT:
+            return self.object_list.filter(
+                Q(**{f'{field}__lte': date})
+                & ~Q(**{field: date, f'{key}__gte': pk})
+            ).order_by(f'-{field}', f'-{key}')
+        return self.object_list.filter(
+            Q(**{f'{field}__gte': date})
+            & ~Q(**{field: date, f'{key}__lte': pk})
+        ).order_by(field, key)
+
+    def page_queryset(self, cursor):
+        """Упорядоченный QuerySet от позиции курсора и её направление.
+
+        Для пустого или испорченного курсора - начало ленты.
+        """
+        position = decode_cursor(cursor)
+        if position is None:
+            return self.object_list.order_by(
+                f'-{self.date_field}', f'-{self.key_field}'
+            ), None
+        return self._window(*position), position[0]
+
+    def get_page(self, cursor):
+        """Возвращает страницу, начинающуюся с позиции курсора."""
+        queryset, direction = self.page_queryset(cursor)
+        if direction is None:
+            cursor = ''
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == PREVIOUS:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.cursor_for(NEXT, rows[-1])
+        if rows and has_previous:
+            previous_cursor = self.cursor_for(PREVIOUS, rows[0])
+        return CursorPage(
+            rows, self, cursor, next_cursor, previous_cursor
+        )
+
+
+def paginate(request, queryset, per_page=None, **cursor_fields):
+    """Возвращает страницу ленты для запроса.
+
+    Ссылки вида ?page=N обслуживаются обычным Paginator.
+    Параметр ?cursor=<токен> (или настройка POSTS_CURSOR_PAGINATION)
+    включает пагинацию по курсору; cursor_fields задают поля ключа.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGE
+    cursor = request.GET.get('cursor')
+    if cursor is not None or (
+        settings.POSTS_CURSOR_PAGINATION and 'page' not in request.GET
+    ):
+        return CursorPaginator(
+            queryset, per_page, **cursor_fields
+        ).get_page(cursor)
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get('page'))
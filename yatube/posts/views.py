@@ -1,18 +1,25 @@
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 
+from . import (
+    comment_buffer, conditional, counters, follows, groups, images,
+    page_cache, parallel, search, timeline, trending, unread,
+)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Post, User
+from .utils import CursorPaginator, paginate
 
 
+@page_cache.cache_anonymous_page(lambda: [page_cache.FEED])
 def index(request):
     """Обработчик запросов на главной странице."""
-    posts = Post.objects.all()
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.feed()
+    page_obj = paginate(request, posts)
     templates = 'posts/index.html'
     title = 'Главная страница'
     context = {
@@ -22,13 +29,34 @@ def index(request):
     return render(request, templates, context)
 
 
+@page_cache.cache_anonymous_page(
+    lambda: [page_cache.FEED, page_cache.HOT]
+)
+def hot(request):
+    """Обработчик ленты популярного.
+
+    Всегда по курсору: страница - один диапазон индекса, без COUNT.
+    """
+    page_obj = CursorPaginator(
+        trending.hot_posts(), settings.POSTS_PER_PAGE,
+        date_field='hot_date', key_field='hot_key',
+    ).get_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+        'title': 'Популярное',
+    }
+    return render(request, 'posts/hot.html', context)
+
+
+@page_cache.cache_anonymous_page(lambda slug: [('group', slug)])
+@conditional.conditional_page(conditional.group_modified)
 def group_posts(request, slug):
     """Обработчик запросов на странице сообществ."""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = groups.get_by_slug(slug)
+    if group is None:
+        raise Http404
+    posts = group.posts.feed()
+    page_obj = paginate(request, posts)
     templates = 'posts/group_list.html'
     title = 'Записи сообщества:'
     context = {
@@ -39,56 +67,122 @@ def group_posts(request, slug):
     return render(request, templates, context)
 
 
+@page_cache.cache_anonymous_page(lambda username: [('author', username)])
+@conditional.conditional_page(conditional.profile_modified)
 def profile(request, username):
     """Обработчик запросов профайла пользователя."""
-    author = get_object_or_404(User, username=username)
-    count_posts = author.posts.count()
-    posts = author.posts.all()
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    stats = counters.user_stats(author)
+    posts = author.posts.feed()
+    # Число постов, страница и подписки читателя для кнопки
+    # «Подписаться» читаются параллельно
+    calls = []
+    if request.user.is_authenticated:
+        calls.append(lambda: follows.followed_ids(request))
+    page_obj, *_ = parallel.paginate(request, posts, *calls)
     template = 'posts/profile.html'
     title = 'Профайл пользователя'
-    following = (request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author).exists()
-    )
     context = {
         'author': author,
-        'count_posts': count_posts,
+        'count_posts': stats.posts_count,
+        'stats': stats,
         'page_obj': page_obj,
         'title': title,
-        'following': following,
     }
     return render(request, template, context)
 
 
+@page_cache.cache_anonymous_page(lambda post_id: [('post', post_id)])
+@conditional.conditional_page(
+    conditional.post_modified, comment_buffer.pending_state
+)
 def post_detail(request, post_id):
     """Обработчик страницы отдельного поста."""
-    post = get_object_or_404(Post, id=post_id)
-    posts_count = post.author.posts.count()
-    form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    # Комментарии выбираются по id поста, поэтому читаются
+    # параллельно с самим постом
+    post, comments = parallel.gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__stats', 'group', 'stats'),
+            id=post_id,
+        ),
+        lambda: comments_page(request, post_id),
+    )
+    # Число постов автора в карточке устаревает вместе с его профилем
+    page_cache.depend_on(request, ('author', post.author.username))
+    posts_count = counters.user_stats(post.author).posts_count
     template = 'posts/post_detail.html'
     context = {
         'post': post,
         'posts_count': posts_count,
+        'comments_count': counters.post_stats(post).comments_count,
         'comments': comments,
-        'form': form,
     }
     return render(request, template, context)
 
 
+@page_cache.cache_anonymous_page(lambda post_id: [('post', post_id)])
+def post_comments(request, post_id):
+    """Следующая порция комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
+    comments = comments_page(request, post)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post': post,
+        'comments': comments,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+def comments_page(request, post):
+    """Страница комментариев поста (объект или id) по курсору."""
+    comments = Comment.objects.filter(post=post).select_related(
+        'author'
+    ).only('text', 'created', 'post_id', 'author__username')
+    return CursorPaginator(
+        comments, settings.COMMENTS_PER_PAGE, date_field='created'
+    ).get_page(request.GET.get('cursor'))
+
+
+def post_search(request):
+    """Обработчик поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    results = search.search(query) if query else []
+    paginator = Paginator(results, settings.POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+        'title': 'Поиск',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     """Обработчик страницы создания поста."""
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     template = 'posts/create_post.html'
     title = 'Новый пост'
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        images.schedule_processing(post)
         return redirect('posts:profile', username=request.user.username)
 
     context = {
@@ -111,7 +205,9 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            images.schedule_processing(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -124,9 +220,12 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     """Обработчик добавления коментария к посту."""
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('pk'), id=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
+    if form.is_valid() and comment_buffer.is_enabled():
+        # Комментарий запишется в базу порцией вместе с другими
+        comment_buffer.add(request, post, form.cleaned_data['text'])
+    elif form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
@@ -139,27 +238,34 @@ def follow_index(request):
     """Обработчик страницы со списком постов автора
     на которого подписан пользователь.
     """
-    posts = Post.objects.filter(
-        author__following__user=request.user
+    posts = timeline.timeline_posts(request.user)
+    page_obj = paginate(
+        request, posts, date_field='feed_date', key_field='feed_key'
     )
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if not page_obj.has_previous():
+        # Новые посты видны на первой странице, дальние страницы
+        # счётчик не трогают
+        unread.mark_seen(request.user)
     context = {
         'page_obj': page_obj
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def follow_unread(request):
+    """Число новых постов ленты подписок для опроса клиентом."""
+    count, seen = unread.state(request.user)
+    response = JsonResponse({'unread': count, 'seen': seen})
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @login_required
 def profile_follow(request, username):
     """Обработчик подписки на автора."""
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author,
-        )
+    follows.follow(request, author)
     return redirect('posts:profile', username=username)
 
 
@@ -167,9 +273,5 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Обработчик отписки от автора."""
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.filter(
-            user=request.user,
-            author=author,
-        ).delete()
+    follows.unfollow(request, author)
     return redirect('posts:profile', username=username)
@@ -1,5 +1,7 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -31,11 +33,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.LoginMarkerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -47,9 +51,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -62,14 +65,80 @@ TEMPLATES = [
     },
 ]
 
+# Профиль шаблонов: с TEMPLATE_CACHE=1 (по умолчанию при DEBUG=False)
+# шаблоны читаются с диска и компилируются один раз на процесс,
+# а не на каждый {% include %}. Правки шаблонов тогда видны
+# только после перезапуска.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATE_CACHE = bool(int(os.getenv('TEMPLATE_CACHE', int(not DEBUG))))
+TEMPLATES[0]['OPTIONS']['loaders'] = (
+    [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+    if TEMPLATE_CACHE else TEMPLATE_LOADERS
+)
+# Сколько хранить отрисованные карточки постов (0 - не кэшировать).
+# Ключ карточки включает дату изменения поста, поэтому правка
+# поста сама вытесняет старую карточку.
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Только WSGI: обработчик ASGI появился в Django 3.0, асинхронные
+# представления - в 3.1, а проект закреплён на 2.2 (tests/conftest.py
+# требует Django < 3.0). Независимые запросы страниц профиля и поста
+# читаются параллельно в пуле потоков (PAGE_QUERY_WORKERS).
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# База выбирается переменной окружения DATABASE_ENGINE: sqlite или postgresql.
+# Соединение живёт DB_CONN_MAX_AGE секунд и переиспользуется запросами,
+# а не открывается заново на каждый запрос.
+# Драйвер PostgreSQL ставится из requirements-postgres.txt.
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yatube'),
+            'USER': os.getenv('POSTGRES_USER', 'yatube'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # За пулером PgBouncer в режиме transaction именованные
+            # курсоры (QuerySet.iterator) живут дольше транзакции
+            # и ломаются, поэтому за пулером они выключаются
+            'DISABLE_SERVER_SIDE_CURSORS': bool(
+                int(os.getenv('DB_POOLER', 0))
+            ),
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        }
     }
+
+# PRAGMA для каждого нового соединения SQLite (core.db.configure_sqlite).
+# WAL пускает чтения параллельно записи, synchronous=NORMAL в WAL
+# не теряет целостность при сбое, mmap_size читает файл без копирования,
+# busy_timeout ждёт блокировку записи вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -111,12 +180,133 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_PER_PAGE = 10
+# Комментарии на странице поста и в каждой следующей порции
+COMMENTS_PER_PAGE = 20
+# Отложенная запись комментариев: сохранять порциями по
+# COMMENT_BUFFER_SIZE или раз в COMMENT_BUFFER_SECONDS (0 - писать сразу).
+# COMMENT_BUFFER_JOURNAL - каталог журналов буфера на диске; без него
+# несохранённые комментарии теряются при падении процесса.
+COMMENT_BUFFER_SIZE = int(os.getenv('COMMENT_BUFFER_SIZE', 0))
+COMMENT_BUFFER_SECONDS = float(os.getenv('COMMENT_BUFFER_SECONDS', 1))
+COMMENT_BUFFER_JOURNAL = os.getenv('COMMENT_BUFFER_JOURNAL', '')
+# Размер страницы JSON API по умолчанию и предел для ?limit=
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+# Пагинация лент по курсору (pub_date, id) вместо ?page=N.
+# Ссылки ?page=N продолжают работать в любом режиме.
+POSTS_CURSOR_PAGINATION = False
+
+# Лента подписок раскладывается по читателям при публикации.
+# Посты авторов, у которых подписчиков не меньше порога,
+# не раскладываются, а подмешиваются в ленту при чтении.
+TIMELINE_CELEBRITY_FOLLOWERS = 1000
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL_POSTS = 100
+TIMELINE_MAX_LENGTH = 1000
+# Лента обрезается до TIMELINE_MAX_LENGTH, когда перерастёт его на столько
+TIMELINE_TRIM_SLACK = 100
+TIMELINE_BATCH_SIZE = 500
+
+# Лента популярного (posts.trending): вес комментария и подписчиков
+# автора затухает в e раз за HOT_DECAY_SECONDS. Горячие даты
+# пересчитывает команда refresh_hot_posts, её стоит запускать по cron.
+HOT_DECAY_SECONDS = 12 * 60 * 60
+HOT_FOLLOWER_WEIGHT = 1.0
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Превью картинок постов, которые строятся сразу после загрузки:
+# геометрия и опции sorl-thumbnail, как в тегах {% thumbnail %} шаблонов.
+POST_IMAGE_RENDITIONS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Потоки фонового построения превью. 0 - строить в запросе;
+# с тестовой базой SQLite в памяти превью тоже строятся в запросе.
+POST_IMAGE_WORKERS = int(os.getenv('POST_IMAGE_WORKERS', 2))
+# Потоки для параллельного чтения независимых запросов страницы
+# (posts.parallel). 0 - запросы по очереди; внутри транзакции и
+# с тестовой базой SQLite в памяти они тоже идут по очереди.
+PAGE_QUERY_WORKERS = int(os.getenv('PAGE_QUERY_WORKERS', 4))
+# Загруженная картинка пересохраняется без EXIF, уменьшается до
+# POST_IMAGE_MAX_SIZE по большей стороне и перекодируется в
+# POST_IMAGE_FORMAT (JPEG, если Pillow собран без WebP).
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 82
+# Сторона размытой заглушки, которая видна до загрузки превью
+POST_IMAGE_PLACEHOLDER_SIZE = 16
+
+# Кэш: locmem - в памяти процесса (каждый воркер gunicorn греет свой),
+# memcached - общий для всех процессов (CACHE_LOCATION - адрес сервера),
+# sqlite - файл, общий для процессов одного сервера, с вытеснением LRU.
+CACHE_BACKENDS = {
+    'locmem': 'core.metrics.LocMemCache',
+    'memcached': 'core.cache.MemcachedCache',
+    'sqlite': 'core.cache.SQLiteCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_LOCATIONS = {
+    'locmem': '',
+    'memcached': '127.0.0.1:11211',
+    'sqlite': os.path.join(BASE_DIR, 'cache.sqlite3'),
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', CACHE_LOCATIONS[CACHE_BACKEND]
+        ),
+    }
+}
+if CACHE_BACKEND == 'memcached':
+    try:
+        import memcache  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            'CACHE_BACKEND=memcached требует пакет python-memcached '
+            '(pip install -r requirements.txt)'
+        )
+else:
+    # Клиенту memcached OPTIONS передаются как аргументы,
+    # а вытеснением там управляет сам сервер
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
     }
+
+# Сколько хранить целые страницы для анонимных посетителей (0 - не кэшировать).
+# Страницы сбрасываются сменой версий при изменении данных,
+# поэтому срок можно держать большим.
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Общие страницы: при SHARED_PAGES=1 кэшированные страницы собираются
+# как для гостя и отдаются всем с Cache-Control: public, а личные части
+# вошедший пользователь догружает отдельно (см. core.personal).
+SHARED_PAGES = bool(int(os.getenv('SHARED_PAGES', 0)))
+SHARED_PAGE_MAX_AGE = 60
+# Cookie, по которой JavaScript общей страницы узнаёт о входе
+LOGIN_MARKER_COOKIE = 'logged_in'
+
+# Доля запросов, для которых PerformanceMiddleware собирает замеры
+# (SQL, шаблоны, кэш) и отдаёт заголовок Server-Timing.
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', 0))
+# Запросы не быстрее порога пишутся в лог с уровнем WARNING
+PERFORMANCE_SLOW_REQUEST_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }